@@ -1,22 +1,15 @@
+import os
 import sys
 import json
 import re
 
-
-def clean_phone_number(phone):
-    if not phone:
-        return None
-    phone_str = str(phone).strip()
-    cleaned = re.sub(r"[-\s\(\)\.]", "", phone_str)
-    cleaned = re.sub(r"[^\d+]", "", cleaned)
-    if not cleaned.startswith("+") and cleaned.startswith("0"):
-        cleaned = cleaned.lstrip("0")
-    if not cleaned.startswith("+") and len(cleaned) > 10:
-        cleaned = "+" + cleaned
-    digits_only = re.sub(r"[^\d]", "", cleaned)
-    if len(digits_only) < 7 or len(digits_only) > 15:
-        return None
-    return cleaned
+# Phone numbers are normalized by python-backend's phone_numbers.py. Packaged builds
+# get a copy of it (and calling_codes.py) next to this file, see vite.config.js;
+# a source checkout imports it from python-backend.
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "python-backend")
+)
+from phone_numbers import clean_phone_number  # noqa: E402
 
 
 def parse_manual_numbers(numbers_text):
@@ -1,10 +1,31 @@
 import { defineConfig } from 'vite'
 import react from '@vitejs/plugin-react'
 import tailwindcss from '@tailwindcss/vite'
+import { readFileSync } from 'node:fs'
+
+// python-backend modules that public/py/parse_manual_numbers.py imports. Packaged
+// builds only ship dist-react, so they are copied next to it in dist-react/py
+const BACKEND_PY = ['phone_numbers.py', 'calling_codes.py']
+
+function backendPy() {
+  return {
+    name: 'backend-py',
+    apply: 'build',
+    generateBundle() {
+      for (const file of BACKEND_PY) {
+        this.emitFile({
+          type: 'asset',
+          fileName: `py/${file}`,
+          source: readFileSync(new URL(`../python-backend/${file}`, import.meta.url)),
+        })
+      }
+    },
+  }
+}
 
 // https://vite.dev/config/
 export default defineConfig({
-  plugins: [tailwindcss(),react()],
+  plugins: [tailwindcss(),react(),backendPy()],
   base: "./",
   build: {
     outDir: "dist-react",
@@ -1,56 +1,361 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify
+from flask import Flask, render_template, request, redirect, url_for, jsonify, abort
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy import event, func, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 from werkzeug.utils import secure_filename
 from flask_cors import CORS  # Add this import
 
 import os
+import threading
+import time
+import pandas as pd
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
-app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:///database.db"
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URI', "sqlite:///database.db")
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+# SQLITE_TUNING=0 keeps SQLite's defaults (rollback journal, one lock for readers and writers)
+SQLITE_TUNING = os.environ.get('SQLITE_TUNING', '1') != '0'
+# Set on every new connection: WAL lets reads run while a write is in progress,
+# and with WAL synchronous=NORMAL only fsyncs at checkpoints
+SQLITE_PRAGMAS = (
+    'journal_mode=WAL',
+    'synchronous=NORMAL',
+    'cache_size=-65536', # 64MB page cache per connection
+    'temp_store=MEMORY',
+    'mmap_size=268435456',
+    'journal_size_limit=67108864', # truncate the WAL back to 64MB after checkpoints
+)
+# Set for the length of one big import (see bulk_load()), then put back to SQLITE_PRAGMAS
+BULK_LOAD_PRAGMAS = (
+    'synchronous=OFF',
+    'cache_size=-262144',
+)
+if SQLITE_TUNING:
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': 10,
+        'max_overflow': 20,
+        'connect_args': {'timeout': 30}, # seconds a writer waits for another writer to finish
+    }
 db = SQLAlchemy(app)
 
+def tune_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f'PRAGMA {pragma}')
+    cursor.close()
+
+# Puts a connection used by bulk_load() back to the normal pragmas when it returns to the pool
+def end_bulk_load(dbapi_connection, connection_record):
+    if connection_record.info.pop('bulk_load', False):
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            if pragma.split('=')[0] in ('synchronous', 'cache_size'):
+                cursor.execute(f'PRAGMA {pragma}')
+        cursor.close()
+
+# Context manager for big imports: until the session's transaction ends, its connection
+# skips fsyncs and gets a bigger page cache. Commit inside the block
+@contextmanager
+def bulk_load():
+    if SQLITE_TUNING:
+        connection = db.session.connection()
+        for pragma in BULK_LOAD_PRAGMAS:
+            connection.exec_driver_sql(f'PRAGMA {pragma}')
+        connection.connection.info['bulk_load'] = True
+    yield
+
 # Define a table containing the list of users(string) their name(string) login_password(string) and the tables(json) they have creted
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
-    username = db.Column(db.String(50), nullable=False)
+    username = db.Column(db.String(50), nullable=False, unique=True, index=True)
     login_password = db.Column(db.String(50), nullable=False)
-    tables = db.Column(db.JSON(50), default={})
+    tables = db.Column(db.JSON(50), default={}) # no longer written; lists live in ContactList
 
     def __repr__(self):
         # return {'username': self.username, 'login_password': self.login_password, 'tables': self.tables}
         return f"(username:{self.username}, name:{self.name}, password:{self.login_password}, tables:{self.tables})"
 
+# Define a table containing the contact lists (tables) of every user, in the order they were created
+class ContactList(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    name = db.Column(db.String(200), nullable=False)
+
+    __table_args__ = (db.Index('ix_contact_list_user_name', 'user_id', 'name', unique=True),)
+
+    def __repr__(self):
+        return f"(user_id:{self.user_id}, name:{self.name})"
+
+# Define a table containing the contacts of every uploaded list, keyed by the user and the list name
+class Contact(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    list_name = db.Column(db.String(200), nullable=False)
+    name = db.Column(db.String(100), nullable=True)
+    place = db.Column(db.String(100), nullable=True)
+    phone_no = db.Column(db.String(32), nullable=False)
+    email = db.Column(db.String(100), nullable=True)
+    tag = db.Column(db.String(50), nullable=True)
+    tag_key = db.Column(db.String(50), nullable=True) # normalize_tag(tag), for tag filters
+    name_reversed = db.Column(db.String(100), nullable=True) # name spelled backwards, for ends_with filters
+    country_code = db.Column(db.String(8), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_contact_user_list', 'user_id', 'list_name'),
+        db.Index('ix_contact_user_list_tag', 'user_id', 'list_name', 'tag_key'),
+        db.Index('ix_contact_user_list_name', 'user_id', 'list_name', 'name'),
+        db.Index('ix_contact_user_list_name_reversed', 'user_id', 'list_name', 'name_reversed'),
+    )
+
+# Function to normalize a tag for tag filters (None for an empty tag)
+def normalize_tag(tag):
+    return str(tag).strip().lower() or None
+
+# Trigram index of contact names for contains filters: an FTS5 table over contact.name (SQLite 3.34+).
+# It holds no copy of the names and is kept in step with the contact table by import_contacts()
+CONTACT_NAME_DDL = ("CREATE VIRTUAL TABLE contact_name USING fts5(name, content='contact', content_rowid='id', "
+                    "tokenize='trigram case_sensitive 1', detail='none')")
+NAME_GRAM = 3 # patterns shorter than a trigram can't use contact_name
+
 with app.app_context():
+    if SQLITE_TUNING:
+        event.listen(db.engine, 'connect', tune_sqlite)
+        event.listen(db.engine, 'checkin', end_bulk_load)
     db.create_all()
+    # create_all() doesn't add indexes to a users table made by older versions
+    try:
+        db.session.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS ix_user_username ON user (username)'))
+        db.session.commit()
+    except IntegrityError:
+        # Duplicate usernames from before the index; look them up through a plain index
+        db.session.rollback()
+        db.session.execute(text('CREATE INDEX IF NOT EXISTS ix_user_username_dup ON user (username)'))
+        db.session.commit()
+    # Filter columns added to the contact table after it was first created, filled in for the contacts already stored
+    columns = [row[1] for row in db.session.execute(text('PRAGMA table_info(contact)'))]
+    added = [(column, ddl) for column, ddl in (('tag_key', 'VARCHAR(50)'), ('name_reversed', 'VARCHAR(100)')) if column not in columns]
+    for column, ddl in added:
+        db.session.execute(text(f'ALTER TABLE contact ADD COLUMN {column} {ddl}'))
+    if added:
+        rows = db.session.execute(text('SELECT id, tag, name FROM contact')).all()
+        if rows:
+            db.session.execute(
+                text('UPDATE contact SET tag_key = :tag_key, name_reversed = :name_reversed WHERE id = :id'),
+                [{'id': id, 'tag_key': None if tag is None else normalize_tag(tag), 'name_reversed': None if name is None else name[::-1]}
+                 for id, tag, name in rows])
+    for index in Contact.__table__.indexes:
+        db.session.execute(text('CREATE INDEX IF NOT EXISTS {} ON contact ({})'.format(index.name, ', '.join(column.name for column in index.columns))))
+    db.session.commit()
+    # Without FTS5 (or its trigram tokenizer) contains filters check every name of the list instead
+    NAME_SEARCH = db.session.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'contact_name'")).first() is not None
+    if not NAME_SEARCH:
+        try:
+            db.session.execute(text(CONTACT_NAME_DDL))
+            db.session.execute(text("INSERT INTO contact_name (contact_name) VALUES ('rebuild')")) # index the stored names
+            db.session.commit()
+            NAME_SEARCH = True
+        except OperationalError:
+            db.session.rollback()
+    # Move lists kept in the old User.tables JSON into ContactList, once
+    if ContactList.query.first() is None:
+        for user in User.query.all():
+            if user.tables:
+                for name in dict.fromkeys(user.tables.values()):
+                    db.session.add(ContactList(user_id=user.id, name=name))
+                user.tables = {}
+        db.session.commit()
 
 # admin = User(username='admin', name = "tashif", login_password='000', tables={0:"f", 1:"g", 2:"h"})
 # with app.app_context():
 #     db.session.add(admin)
 #     db.session.commit()
 
-def all_details():
-    with app.app_context():
-        all_users = User.query.all()
-        ids = [user.id for user in all_users]
-        users = [user.username for user in all_users]
-        names = [user.name for user in all_users]
-        passwords = [user.login_password for user in all_users]
-        tables = [user.tables for user in all_users]
-        return ids, users, names, passwords, tables
+# A copy of one user's row, kept in the per-process user cache
+class CachedUser:
+    __slots__ = ('id', 'username', 'name', 'login_password', 'tables', 'loaded')
+
+    def __init__(self, user, lists):
+        self.id = user.id
+        self.username = user.username
+        self.name = user.name
+        self.login_password = user.login_password
+        self.tables = {str(i): name for i, name in enumerate(lists)}
+        self.loaded = time.monotonic()
+
+# Recently used users by username, so logins and page loads skip the database.
+# Every write to a user drops its entry; entries also expire after `ttl` seconds
+# so changes made by other server processes show up
+class UserCache:
+    def __init__(self, max_users=10000, ttl=60):
+        self.max_users = max_users
+        self.ttl = ttl
+        self.users = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, username):
+        with self.lock:
+            user = self.users.get(username)
+            if user is None:
+                return None
+            if time.monotonic() - user.loaded > self.ttl:
+                del self.users[username]
+                return None
+            self.users.move_to_end(username)
+            return user
+
+    def put(self, user):
+        with self.lock:
+            self.users[user.username] = user
+            self.users.move_to_end(user.username)
+            while len(self.users) > self.max_users:
+                self.users.popitem(last=False)
+
+    def discard(self, username):
+        with self.lock:
+            self.users.pop(username, None)
+
+user_cache = UserCache()
+
+# Function to get one user's details (or None) through the unique username index
+def get_user(username):
+    user = user_cache.get(username)
+    if user is None:
+        row = User.query.filter_by(username=username).first()
+        if row is None:
+            return None
+        lists = db.session.query(ContactList.name).filter_by(user_id=row.id).order_by(ContactList.id)
+        user = CachedUser(row, [name for name, in lists])
+        user_cache.put(user)
+    return user
+
+# Function to check whether a user has a list, through the (user, name) index
+def has_list(user_id, name):
+    return db.session.query(ContactList.id).filter_by(user_id=user_id, name=name).first() is not None
+
+# Function to add a list to a user with one insert; commit, then call user_cache.discard()
+def add_list(user_id, name):
+    db.session.add(ContactList(user_id=user_id, name=name))
+
+# Spreadsheet headers (lowercased) and the contact column they fill
+CONTACT_COLUMNS = {
+    'name': 'name',
+    'place': 'place',
+    'phone no.': 'phone_no',
+    'phone no': 'phone_no',
+    'phone': 'phone_no',
+    'email': 'email',
+    'tag': 'tag',
+    'country code': 'country_code',
+}
+IMPORT_BATCH_ROWS = 10000 # rows sent to SQLite per executemany
+FETCH_IDS = 500 # contacts read per query when reading filter matches by id
+LAST_CHAR = '\U0010ffff' # sorts after any character, so prefix + LAST_CHAR ends the range of a prefix
+
+# Function to read a csv/xlsx/xls file into {contact column: list of values}
+def read_contact_columns(file_path):
+    if file_path.lower().endswith('.csv'):
+        df = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+    else:
+        df = pd.read_excel(file_path, dtype=str, keep_default_na=False)
+    columns = {}
+    for header in df.columns:
+        column = CONTACT_COLUMNS.get(str(header).strip().lower())
+        if column and column not in columns:
+            columns[column] = df[header].str.strip().tolist()
+    if 'phone_no' not in columns:
+        raise ValueError("No 'Phone No.' column found")
+    return columns
+
+# Function to store the contacts of a file as the list `list_name` of a user, replacing what the list held.
+# Rows go in with batched executemany calls on the session's connection, so they are
+# committed (or rolled back) together with the caller's other changes
+def import_contacts(user_id, list_name, file_path):
+    columns = read_contact_columns(file_path)
+    if 'tag' in columns:
+        columns['tag_key'] = [normalize_tag(tag) for tag in columns['tag']]
+    if 'name' in columns:
+        columns['name_reversed'] = [name[::-1] for name in columns['name']]
+    names = list(columns)
+    phone = names.index('phone_no')
+    rows = [
+        (user_id, list_name) + values
+        for values in zip(*(columns[name] for name in names))
+        if values[phone]
+    ]
+    connection = db.session.connection()
+    if NAME_SEARCH:
+        # contact_name reads no names of its own, so it is told which names it loses
+        connection.exec_driver_sql("INSERT INTO contact_name (contact_name, rowid, name) SELECT 'delete', id, name FROM contact "
+                                   'WHERE user_id = ? AND list_name = ?', (user_id, list_name))
+    Contact.query.filter_by(user_id=user_id, list_name=list_name).delete(synchronize_session=False)
+    sql = 'INSERT INTO contact (user_id, list_name, {}) VALUES ({})'.format(', '.join(names), ', '.join('?' * (len(names) + 2)))
+    for start in range(0, len(rows), IMPORT_BATCH_ROWS):
+        connection.exec_driver_sql(sql, rows[start:start + IMPORT_BATCH_ROWS])
+    if NAME_SEARCH:
+        connection.exec_driver_sql('INSERT INTO contact_name (rowid, name) SELECT id, name FROM contact WHERE user_id = ? AND list_name = ?',
+                                   (user_id, list_name))
+    return len(rows)
+
+# Function to read the contacts of a list in upload order, a batch of rows at a time, through the (user, list) index.
+# With a tag, only the contacts with that tag are read, through the (user, list, tag) index
+def iter_list_contacts(user_id, list_name, tag=None, batch_rows=IMPORT_BATCH_ROWS):
+    conditions = [Contact.user_id == user_id, Contact.list_name == list_name]
+    if tag is not None:
+        tag_key = normalize_tag(tag)
+        if tag_key is None:
+            return # an empty tag matches nothing
+        conditions.append(Contact.tag_key == tag_key)
+    last_id = 0
+    while True:
+        batch = (Contact.query
+                 .filter(*conditions, Contact.id > last_id)
+                 .order_by(Contact.id)
+                 .limit(batch_rows)
+                 .all())
+        if not batch:
+            return
+        yield from batch
+        last_id = batch[-1].id
+
+# Function to read the contacts of a list whose name starts with/ends with/contains name_pattern, in upload order.
+# starts_with is a range of the (user, list, name) index and ends_with a range of the (user, list, reversed name)
+# index; contains looks the pattern up in the contact_name trigram index, then checks the names it finds
+def iter_name_matches(user_id, list_name, filter_condition, name_pattern):
+    conditions = [Contact.user_id == user_id, Contact.list_name == list_name]
+    if filter_condition == 'starts_with':
+        conditions += [Contact.name >= name_pattern, Contact.name < name_pattern + LAST_CHAR]
+    elif filter_condition == 'ends_with':
+        suffix = name_pattern[::-1]
+        conditions += [Contact.name_reversed >= suffix, Contact.name_reversed < suffix + LAST_CHAR]
+    elif filter_condition == 'contains':
+        conditions.append(func.instr(Contact.name, name_pattern) > 0) # case-sensitive, unlike LIKE
+        # Short patterns, and ones with GLOB wildcards, check every name of the list
+        if NAME_SEARCH and len(name_pattern) >= NAME_GRAM and not any(char in name_pattern for char in '*?['):
+            conditions.append(text('contact.id IN (SELECT rowid FROM contact_name WHERE name GLOB :glob)').bindparams(glob=f'*{name_pattern}*'))
+    else:
+        raise ValueError(f"Unknown filter condition '{filter_condition}'. Use starts_with, ends_with or contains.")
+    ids = [id for id, in db.session.query(Contact.id).filter(*conditions).order_by(Contact.id)]
+    return iter_contacts_by_id(ids)
+
+# Function to read contacts by id (ascending), a batch at a time
+def iter_contacts_by_id(ids):
+    for start in range(0, len(ids), FETCH_IDS):
+        yield from Contact.query.filter(Contact.id.in_(ids[start:start + FETCH_IDS])).order_by(Contact.id)
 
 @app.route('/', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form['email']
         login_password = request.form['pass']
-        data = all_details()
-        if username in data[1] and login_password == data[3][data[1].index(username)]:
-            return render_template("buttons.html", username=username, tables=data[-1][data[1].index(username)], name=data[2][data[1].index(username)].title())
+        user = get_user(username)
+        if user and login_password == user.login_password:
+            return render_template("buttons.html", username=username, tables=user.tables, name=user.name.title())
         else:
             return render_template('index.html', error_message='Invalid username or password')
     else:
@@ -62,15 +367,19 @@ def signup():
         name = request.form['c_name']
         username = request.form['c_email']
         login_password = request.form['c_pass']
-        data = all_details()
-        if username in data[1]:
-            error_message = 'Email already exists. Please use a different email.'
+        error_message = 'Email already exists. Please use a different email.'
+        if get_user(username):
             return render_template('index.html', error_message=error_message)
         else:
             user = User(username=username, name=name, login_password=login_password, tables={})
-            with app.app_context():
-                db.session.add(user)
+            db.session.add(user)
+            try:
                 db.session.commit()
+            except IntegrityError:
+                # Someone signed up with the same email in the meantime
+                db.session.rollback()
+                return render_template('index.html', error_message=error_message)
+            user_cache.discard(username)
             return render_template('index.html', success_message='Account created successfully. Please login to continue.')
     else:
         return render_template('index.html')
@@ -109,18 +418,27 @@ def upload(username):
         else: 
             # Save the file to the desired location
             filename = f"{username}_{secure_filename(file.filename)}"
-            details = all_details()
-            user = User.query.filter_by(username=username).first()
-            len_json = len(user.tables)
-            user.tables[len_json] = filename   
-            print(user.tables)
-            file.save(os.path.join('uploads/', file.filename))
-            # Mark the 'tables' field as modified to ensure it gets updated
-            flag_modified(user, 'tables')
-            db.session.commit()
-            details = all_details()
-            print(details)
-            return render_template('buttons.html', success='File successfully uploaded', username=username, all_data=details)
+            user = get_user(username)
+            if user is None:
+                abort(404)
+            file_path = os.path.join('uploads/', file.filename)
+            file.save(file_path)
+            with bulk_load():
+                try:
+                    import_contacts(user.id, filename, file_path)
+                except Exception as e:
+                    db.session.rollback()
+                    return render_template('after_login.html', username=username, error=f'Could not read contacts: {e}')
+                if not has_list(user.id, filename):
+                    add_list(user.id, filename)
+                try:
+                    db.session.commit()
+                except IntegrityError:
+                    # The same file was uploaded again in the meantime
+                    db.session.rollback()
+                    return render_template('after_login.html', username=username, error='This file is already being uploaded')
+            user_cache.discard(username)
+            return render_template('buttons.html', success='File successfully uploaded', username=username, all_data=get_user(username))
     return render_template('after_login.html', username=username)
 
 @app.route('/<username>')
@@ -131,53 +449,38 @@ def load_create_table(username):
 def create_table(username):
     if request.method == 'POST':
         table_name = request.form['ffile']
-        data = all_details()
+        user = get_user(username)
+        if user is None:
+            abort(404)
         # Check if the table exists in the database
-        if table_name in data[-1][data[1].index(username)].values():
+        if has_list(user.id, table_name):
             # return f"Table {table_name} already exists for user {username}"
             return render_template('after_login.html', username=username, table_name=table_name, table_exists='Table already exists')
         else:
-            # Define a dynamic table class for each user and table combination
-            table_class_name = f"{username}_{table_name}"
-            DynamicTable = type(table_class_name, (db.Model,),{
-                'id': db.Column(db.Integer, primary_key=True),
-                'name': db.Column(db.String(50), nullable=False),
-                'place': db.Column(db.String(50), nullable=False),
-                'phone_no': db.Column(db.String(10), nullable=False),   
-                'email': db.Column(db.String(50), nullable=True),
-                'tag': db.Column(db.String(50), nullable=True)
-            })
-            user = User.query.filter_by(username=username).first()
-            len_json = len(user.tables)
-            user.tables[len_json] = table_name
-            flag_modified(user, 'tables')
-            db.session.commit()
-        '''
-        Dynamic Allocation of Database Tables explaained:
-        - table_class_name: It's a string that combines username and table_name to create a unique identifier for the table class. This ensures that each user and table combination has a distinct table class name.
-        - DynamicTable: This is the dynamically created table class. It uses the type() function to create a new class with the given name (table_class_name). The parameters for type() are:
-        - table_class_name: The name of the new class.
-        - (db.Model,): A tuple of base classes for the new class. In this case, it inherits from db.Model, which is the base class for SQLAlchemy models.
-            The third argument is a dictionary that defines the attributes of the class. In this case:
-            'id': db.Column(db.Integer, primary_key=True): It defines an id column of type Integer, which serves as the primary key for the table.
-            'data': db.Column(db.String(50), nullable=False): It defines a data column of type String with a maximum length of 50 characters, and it cannot be nullable.
-            By dynamically creating the table class, you can adapt your database schema on-the-fly based on the user and table information provided in the URL. Each combination of username and table_name will have its own unique table class and, consequently, its own database table.
-
-        Create the table in the database
-        '''
-        # return f'Table {table_name} created for user {username} with table class {table_class_name}'
+            # The list's contacts live in the contact table under (user, table_name)
+            add_list(user.id, table_name)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                return render_template('after_login.html', username=username, table_name=table_name, table_exists='Table already exists')
+            user_cache.discard(username)
         return render_template("buttons.html", username=username, table_name=table_name, table_created='Table created successfully')
     
 @app.route('/tables/<username>/load_data')
 def load_data(username):
-    data = all_details()
-    tables = data[-1][data[1].index(username)]
+    user = get_user(username)
+    if user is None:
+        abort(404)
+    tables = user.tables
     return render_template('tables.html', username=username, tables=tables)
     
 @app.route('/tables/<username>', methods=['GET', 'POST'])
 def load_table(username):
-    data = all_details()
-    tables = data[-1][data[1].index(username)]
+    user = get_user(username)
+    if user is None:
+        abort(404)
+    tables = user.tables
     length = len(tables)
     if request.method == 'POST':
         for i in range(length):
@@ -194,7 +497,7 @@ def api_login():
     username = data.get('email')
     login_password = data.get('password')
     
-    user = User.query.filter_by(username=username).first()
+    user = get_user(username)
     
     if user and user.login_password == login_password:
         return jsonify({
@@ -212,20 +515,25 @@ def api_signup():
     username = data.get('email')
     login_password = data.get('password')
     
-    existing_user = User.query.filter_by(username=username).first()
+    existing_user = get_user(username)
     
     if existing_user:
         return jsonify({'error': 'Email already exists'}), 409
     
     user = User(username=username, name=name, login_password=login_password, tables={})
     db.session.add(user)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Email already exists'}), 409
+    user_cache.discard(username)
     
     return jsonify({'message': 'Account created successfully'})
 
 @app.route('/api/tables/<username>/load_data', methods=['GET'])
 def api_load_data(username):
-    user = User.query.filter_by(username=username).first()
+    user = get_user(username)
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
@@ -238,7 +546,7 @@ def api_upload(username):
     def allowed_file(filename):
         return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
     
-    user = User.query.filter_by(username=username).first()
+    user = get_user(username)
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
@@ -255,31 +563,45 @@ def api_upload(username):
         return jsonify({'error': 'File type not supported'}), 400
     
     filename = f"{username}_{secure_filename(file.filename)}"
-    len_json = len(user.tables)
-    user.tables[str(len_json)] = filename
-    file.save(os.path.join('uploads/', filename))
-    flag_modified(user, 'tables')
-    db.session.commit()
+    file_path = os.path.join('uploads/', filename)
+    file.save(file_path)
+    with bulk_load():
+        try:
+            count = import_contacts(user.id, filename, file_path)
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': f'Could not read contacts: {e}'}), 400
+        if not has_list(user.id, filename):
+            add_list(user.id, filename)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': 'This file is already being uploaded'}), 409
+    user_cache.discard(username)
     
-    return jsonify({'message': 'File uploaded successfully', 'filename': filename})
+    return jsonify({'message': 'File uploaded successfully', 'filename': filename, 'count': count})
 
 @app.route('/api/create_table/<username>', methods=['POST'])
 def api_create_table(username):
     data = request.json
     table_name = data.get('tableName')
     
-    user = User.query.filter_by(username=username).first()
+    user = get_user(username)
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
-    if table_name in user.tables.values():
+    if has_list(user.id, table_name):
         return jsonify({'error': 'Table already exists'}), 409
     
-    len_json = len(user.tables)
-    user.tables[str(len_json)] = table_name
-    flag_modified(user, 'tables')
-    db.session.commit()
+    add_list(user.id, table_name)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Table already exists'}), 409
+    user_cache.discard(username)
     
     return jsonify({'message': 'Table created successfully', 'table_name': table_name})
 
@@ -288,12 +610,12 @@ def api_select_table(username):
     data = request.json
     selected_table = data.get('table')
     
-    user = User.query.filter_by(username=username).first()
+    user = get_user(username)
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
-    if selected_table not in user.tables.values():
+    if not has_list(user.id, selected_table):
         return jsonify({'error': 'Table not found'}), 404
     
     # Here you can implement any functionality needed when a table is selected
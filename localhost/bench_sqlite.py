@@ -0,0 +1,142 @@
+'''
+Concurrency benchmark for the localhost app's SQLite database.
+    Reader threads keep looking up users and counting list contacts while writer threads sign users up,
+    create lists and one thread uploads a big contact list. Each mode runs in its own process on a fresh database.
+
+    python bench_sqlite.py                      # tuned and default settings, 10 seconds each
+    python bench_sqlite.py --mode tuned --rows 1000000
+'''
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+MODES = {'tuned': '1', 'default': '0'}
+
+# Function to make a csv contact list of `rows` rows
+def contact_csv(rows):
+    lines = ['Name,Phone No.,Tag']
+    lines.extend(f'Contact {i},98{i:08d},{"odd" if i % 2 else "even"}' for i in range(rows))
+    return ('\n'.join(lines) + '\n').encode()
+
+# Function to run one mode in this process; the database and settings come from the environment
+def run(seconds, readers, writers, rows):
+    from sqlalchemy.exc import OperationalError
+    import app as localhost
+
+    app = localhost.app
+    app.testing = True # let database errors reach the benchmark instead of becoming 500s
+    client = app.test_client()
+    for i in range(100):
+        client.post('/api/signup', json={'name': f'user {i}', 'email': f'user{i}', 'password': 'p'})
+    big_list = contact_csv(rows)
+
+    stop = threading.Event()
+    counts = {'reads': 0, 'writes': 0, 'uploads': 0, 'errors': 0, 'locked': 0}
+    latencies = {'read': [], 'write': []}
+    lock = threading.Lock()
+
+    def record(kind, started, error=None):
+        with lock:
+            if error is None:
+                counts[kind + 's'] += 1
+                if kind in latencies:
+                    latencies[kind].append(time.perf_counter() - started)
+            else:
+                counts['errors'] += 1
+                if 'locked' in str(error):
+                    counts['locked'] += 1
+
+    def reader(n):
+        i = 0
+        with app.app_context():
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    # Straight to the database: the user cache would hide the reads
+                    localhost.User.query.filter_by(username=f'user{(n + i) % 100}').first()
+                    localhost.Contact.query.filter_by(user_id=1, list_name='user0_big.csv').count()
+                    localhost.db.session.rollback()
+                    record('read', started)
+                except OperationalError as e:
+                    localhost.db.session.rollback()
+                    record('read', started, e)
+                i += 1
+
+    def writer(n):
+        i = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                if i % 2:
+                    client.post('/api/signup', json={'name': 'new', 'email': f'new{n}_{i}', 'password': 'p'})
+                else:
+                    client.post(f'/api/create_table/user{n}', json={'tableName': f'list{i}'})
+                record('write', started)
+            except OperationalError as e:
+                record('write', started, e)
+            i += 1
+
+    def uploader():
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                client.post('/api/upload/user0', data={'file': (io.BytesIO(big_list), 'big.csv')})
+                record('upload', started)
+            except OperationalError as e:
+                record('upload', started, e)
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads.append(threading.Thread(target=uploader))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    result = dict(counts)
+    result['reads_per_s'] = round(counts['reads'] / seconds, 1)
+    result['writes_per_s'] = round(counts['writes'] / seconds, 1)
+    for kind, values in latencies.items():
+        values.sort()
+        if values:
+            result[f'{kind}_p50_ms'] = round(values[len(values) // 2] * 1000, 2)
+            result[f'{kind}_p99_ms'] = round(values[int(len(values) * 0.99)] * 1000, 2)
+    return result
+
+# Function to run a mode in a fresh process on a fresh database, returning its results
+def run_mode(mode, seconds, readers, writers, rows):
+    with tempfile.TemporaryDirectory() as directory:
+        os.makedirs(os.path.join(directory, 'uploads'))
+        env = dict(os.environ, SQLITE_TUNING=MODES[mode], DATABASE_URI=f'sqlite:///{os.path.join(directory, "bench.db")}')
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)), env.get('PYTHONPATH')]))
+        command = [sys.executable, os.path.abspath(__file__), '--child', '--seconds', str(seconds), '--readers', str(readers), '--writers', str(writers), '--rows', str(rows)]
+        output = subprocess.run(command, cwd=directory, env=env, check=True, capture_output=True, text=True).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run reads and writes against the SQLite database at the same time')
+    parser.add_argument('--mode', choices=[*MODES, 'both'], default='both')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--rows', type=int, default=200000, help='rows in the list the upload thread keeps importing')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run(args.seconds, args.readers, args.writers, args.rows)))
+        sys.exit(0)
+
+    modes = list(MODES) if args.mode == 'both' else [args.mode]
+    for mode in modes:
+        result = run_mode(mode, args.seconds, args.readers, args.writers, args.rows)
+        print(f'{mode:8} ' + '  '.join(f'{key}={value}' for key, value in result.items()))
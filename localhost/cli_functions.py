@@ -14,6 +14,9 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
 
 # Include all the other required libraries
+import importlib.util
+import os
+import sys
 import schedule
 import time as timee
 import pandas as pd
@@ -21,18 +24,120 @@ import pandas as pd
 from datetime import datetime, timedelta, time
 from urllib.parse import quote
 
+# Phone numbers are normalized with the same calling code table as the python-backend
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python-backend'))
+from calling_codes import CODES, to_e164
+from phone_numbers import HOME_CODE
+
+# Contact lists uploaded through the localhost app are stored in its database (see localhost_app())
+LOCALHOST_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+# Function to turn a phone number into the digits WhatsApp links expect (e.g. 919876543210)
+# Numbers without a country code belong to country_code, or to PHONE_REGION (default IN)
+def whatsapp_number(number, country_code=None):
+    if number is None or (isinstance(number, float) and number != number):
+        return None
+    if isinstance(number, float):
+        number = int(number) # Excel/pandas reads plain numbers as floats
+    home = HOME_CODE
+    if country_code is not None and country_code == country_code:
+        if isinstance(country_code, float):
+            country_code = int(country_code)
+        home = CODES.get(str(country_code).strip().lstrip('+'), HOME_CODE)
+    e164 = to_e164(str(number), home)
+    return e164[1:] if e164 else None
+
+# Function to get the WhatsApp numbers of every row, using a 'Country Code' column if there is one
+def whatsapp_numbers(df, column_name='Phone No.'):
+    if 'Country Code' in df.columns:
+        country_codes = df['Country Code'].tolist()
+    else:
+        country_codes = [None] * len(df)
+    numbers = []
+    for number, country_code in zip(df[column_name].tolist(), country_codes):
+        whatsapp = whatsapp_number(number, country_code)
+        if whatsapp:
+            numbers.append(whatsapp)
+        else:
+            print(f"Skipping invalid phone number: {number}")
+    return numbers
+
+# Function to get the WhatsApp numbers of stored contacts (e.g. a generator of rows) one at a time, skipping invalid numbers
+def stored_numbers(contacts):
+    for contact in contacts:
+        whatsapp = whatsapp_number(contact.phone_no, contact.country_code)
+        if whatsapp:
+            yield whatsapp
+        else:
+            print(f"Skipping invalid phone number: {contact.phone_no}")
+
+# Function to load the localhost app the first time a stored contact list is used; loading it opens (or creates) its database.
+# It is loaded from its path as 'localhost_app', since python-backend, which is on sys.path, has an app.py too
+def localhost_app():
+    module = sys.modules.get('localhost_app')
+    if module is None:
+        spec = importlib.util.spec_from_file_location('localhost_app', LOCALHOST_APP)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['localhost_app'] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules['localhost_app']
+            raise
+    return module
+
 # Function to open WhatsApp Web in the browser
 def open_whastapp():
     driver = webdriver.Chrome(service=Service(ChromeDriverManager().install())) # Install/Creating a new instance of ChromeDriver
     link = "https://web.whatsapp.com/"
     driver.get(link)
     timee.sleep(15)
+    return driver
+
+# Function to send a message to every number from `numbers` (e.g. a generator) in an open WhatsApp Web session
+def send_to_numbers(driver, numbers, message):
+    _message = quote(message)
+    for number in numbers:
+        link_send = f"https://web.whatsapp.com/send?phone={number}&text={_message}" # URL to send a message to a number
+        driver.get(link_send)
+        timee.sleep(5) # Wait for 5 seconds to load the page
+        action = ActionChains(driver) 
+        action.send_keys(Keys.RETURN) 
+        action.perform() 
+        try:
+            send_button = driver.find_elements_by_class_name("tvf2evcx 0q44ahr5 1b5m65c svlsagor p2rjqpw5 epia9gcq")
+            send_button.click()
+        except:
+            pass
+        timee.sleep(5) # Wait for 5 seconds to confirm the message is sent
+
+# Function to send a message to the contacts that contacts(localhost app, user id) reads from a contact list
+# uploaded through the localhost app. The list is checked before WhatsApp Web is opened
+def send_to_list(username, list_name, message, contacts):
+    try:
+        localhost = localhost_app()
+        with localhost.app.app_context():
+            user = localhost.get_user(username)
+            if user is None or not localhost.has_list(user.id, list_name):
+                print(f"Error: There is no contact list named '{list_name}' for '{username}'.")
+                return
+            numbers = stored_numbers(contacts(localhost, user.id))
+            driver = open_whastapp()
+            input("Please scan the QR code, then press Enter to continue.")
+            send_to_numbers(driver, numbers, message)
+
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
 
 # Function to send a message on whatsapp
-def send_message(number, message, country_code="91"):
+def send_message(number, message, country_code=None):
+    number = whatsapp_number(number, country_code)
+    if number is None:
+        print("Error: Invalid phone number.")
+        return
     _message = quote(message)
     driver = webdriver.Chrome(service=Service(ChromeDriverManager().install())) # Install/Creating a new instance of ChromeDriver
-    link = f"https://web.whatsapp.com/send?phone={country_code}{number}&text={_message}" # URL to send a message to a number
+    link = f"https://web.whatsapp.com/send?phone={number}&text={_message}" # URL to send a message to a number
     driver.get(link)
     timee.sleep(5) # Wait for 5 seconds to load the page
     action = ActionChains(driver) 
@@ -57,19 +162,13 @@ def send_messages_csv_all(file_path, message, column_name='Phone No.'):
     try:
         df = pd.read_csv(file_path)
 
-        # check for country code
-        try:
-            country_code = df['Country Code'][0]
-        except KeyError:
-            country_code = "91"
-        
-        numbers = (df['Phone No.'].str.replace(" ", "")).tolist()
+        numbers = whatsapp_numbers(df)
         for number in numbers:
             # send_message(number, message)
             _message = quote(message)
             # driver = webdriver.Chrome(service=Service(ChromeDriverManager().install())) # Install/Creating a new instance of ChromeDriver
-            # link_send = f"https://wa.me/{country_code}{number}?text={_message}"
-            link_send = f"https://web.whatsapp.com/send?phone={country_code}{number}&text={_message}" # URL to send a message to a number
+            # link_send = f"https://wa.me/{number}?text={_message}"
+            link_send = f"https://web.whatsapp.com/send?phone={number}&text={_message}" # URL to send a message to a number
             driver.get(link_send)
             timee.sleep(5) # Wait for 5 seconds to load the page
             # pg.press('return')
@@ -105,19 +204,14 @@ def send_messages_excel_all(file_path, message, column_name='Phone No.'):
     try:
         df = pd.read_excel(file_path)
 
-        try:
-            country_code = df['Country Code'][0]
-        except KeyError:
-            country_code = "91"
-        
-        numbers = (df['Phone No.'].str.replace(" ", "")).tolist()
+        numbers = whatsapp_numbers(df)
         
         for number in numbers:
             # send_message(number, message)
             _message = quote(message)
             # driver = webdriver.Chrome(service=Service(ChromeDriverManager().install())) # Install/Creating a new instance of ChromeDriver
-            # link_send = f"https://wa.me/{country_code}{number}?text={_message}"
-            link_send = f"https://web.whatsapp.com/send?phone={country_code}{number}&text={_message}" # URL to send a message to a number
+            # link_send = f"https://wa.me/{number}?text={_message}"
+            link_send = f"https://web.whatsapp.com/send?phone={number}&text={_message}" # URL to send a message to a number
             driver.get(link_send)
             timee.sleep(5) # Wait for 5 seconds to load the page
             # pg.press('return')
@@ -142,6 +236,10 @@ def send_messages_excel_all(file_path, message, column_name='Phone No.'):
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
+# Function to send messages to all the numbers of a contact list uploaded through the localhost app
+def send_messages_list_all(username, list_name, message):
+    send_to_list(username, list_name, message, lambda localhost, user_id: localhost.iter_list_contacts(user_id, list_name))
+
 
 def schedule_message_everyday(file_path, message, time_hour, time_minute, func):
     # Schedules a message to be sent at the specified time everyday.
@@ -175,17 +273,13 @@ def filter_by_tag_csv(file_path, message, tag, tag_column_name='Tag'):
     # Send a message to all the numbers that have the specified tag in the CSV file
     try:
         df = pd.read_csv(file_path)
-        try:
-            country_code = df['Country Code'][0]
-        except KeyError:
-            country_code = "91"
-        numbers = df[df[tag_column_name].str.lower() == tag.lower()]['Phone No.'].str.replace(" ", "").tolist()
+        numbers = whatsapp_numbers(df[df[tag_column_name].str.lower() == tag.lower()])
         for number in numbers:
             # send_message(number, message)
             _message = quote(message)
             # driver = webdriver.Chrome(service=Service(ChromeDriverManager().install())) # Install/Creating a new instance of ChromeDriver
-            # link_send = f"https://wa.me/{country_code}{number}?text={_message}"
-            link_send = f"https://web.whatsapp.com/send?phone={country_code}{number}&text={_message}" # URL to send a message to a number
+            # link_send = f"https://wa.me/{number}?text={_message}"
+            link_send = f"https://web.whatsapp.com/send?phone={number}&text={_message}" # URL to send a message to a number
             driver.get(link_send)
             timee.sleep(5) # Wait for 5 seconds to load the page
             # pg.press('return')
@@ -220,17 +314,13 @@ def filter_by_tag_excel(file_path, message, tag, tag_column_name='Tag'):
     # Send a message to all the numbers that have the specified tag in the Excel file
     try:
         df = pd.read_excel(file_path)
-        try:
-            country_code = df['Country Code'][0]
-        except KeyError:
-            country_code = "91"
-        numbers = df[df[tag_column_name].str.lower() == tag.lower()]['Phone No.'].str.replace(" ", "").tolist()
+        numbers = whatsapp_numbers(df[df[tag_column_name].str.lower() == tag.lower()])
         for number in numbers:
             # send_message(number, message)
             _message = quote(message)
             # driver = webdriver.Chrome(service=Service(ChromeDriverManager().install())) # Install/Creating a new instance of ChromeDriver
-            # link_send = f"https://wa.me/{country_code}{number}?text={_message}"
-            link_send = f"https://web.whatsapp.com/send?phone={country_code}{number}&text={_message}" # URL to send a message to a number
+            # link_send = f"https://wa.me/{number}?text={_message}"
+            link_send = f"https://web.whatsapp.com/send?phone={number}&text={_message}" # URL to send a message to a number
             driver.get(link_send)
             timee.sleep(5) # Wait for 5 seconds to load the page
             # pg.press('return')
@@ -264,10 +354,6 @@ def filter_numbers_by_name_csv(file_path, message, filter_condition, name_patter
     input("Please scan the QR code, then press Enter to continue.")
     try:
         df = pd.read_csv(file_path)
-        try:
-            country_code = df['Country Code'][0]
-        except KeyError:
-            country_code = "91"
         # Apply the filtering condition based on the name pattern
         if filter_condition == 'starts_with':
             filtered_df = df[df[column_name].str.startswith(name_pattern, na=False)]
@@ -276,13 +362,13 @@ def filter_numbers_by_name_csv(file_path, message, filter_condition, name_patter
         elif filter_condition == 'contains':
             filtered_df = df[df[column_name].str.contains(name_pattern, na=False)]
         # Extract the 'Phone No.' column from the filtered DataFrame
-        filtered_numbers = filtered_df['Phone No.'].str.replace(" ", "").tolist()
+        filtered_numbers = whatsapp_numbers(filtered_df)
         for number in filtered_numbers:
             # send_message(number, message)
             _message = quote(message)
             # driver = webdriver.Chrome(service=Service(ChromeDriverManager().install())) # Install/Creating a new instance of ChromeDriver
-            # link_send = f"https://wa.me/{country_code}{number}?text={_message}"
-            link_send = f"https://web.whatsapp.com/send?phone={country_code}{number}&text={_message}" # URL to send a message to a number
+            # link_send = f"https://wa.me/{number}?text={_message}"
+            link_send = f"https://web.whatsapp.com/send?phone={number}&text={_message}" # URL to send a message to a number
             driver.get(link_send)
             timee.sleep(5) # Wait for 5 seconds to load the page
             # pg.press('return')
@@ -316,10 +402,6 @@ def filter_numbers_by_name_excel(file_path, message, filter_condition, name_patt
     input("Please scan the QR code, then press Enter to continue.")
     try:
         df = pd.read_excel(file_path)
-        try:
-            country_code = df['Country Code'][0]
-        except KeyError:
-            country_code = "91"
         # Apply the filtering condition based on the name pattern
         if filter_condition == 'starts_with':
             filtered_df = df[df[column_name].str.startswith(name_pattern, na=False)]
@@ -328,13 +410,13 @@ def filter_numbers_by_name_excel(file_path, message, filter_condition, name_patt
         elif filter_condition == 'contains':
             filtered_df = df[df[column_name].str.contains(name_pattern, na=False)]
         # Extract the 'Phone No.' column from the filtered DataFrame
-        filtered_numbers = filtered_df['Phone No.'].str.replace(" ", "").tolist()
+        filtered_numbers = whatsapp_numbers(filtered_df)
         for number in filtered_numbers:
             # send_message(number, message)
             _message = quote(message)
             # driver = webdriver.Chrome(service=Service(ChromeDriverManager().install())) # Install/Creating a new instance of ChromeDriver
-            # link_send = f"https://wa.me/{country_code}{number}?text={_message}"
-            link_send = f"https://web.whatsapp.com/send?phone={country_code}{number}&text={_message}" # URL to send a message to a number
+            # link_send = f"https://wa.me/{number}?text={_message}"
+            link_send = f"https://web.whatsapp.com/send?phone={number}&text={_message}" # URL to send a message to a number
             driver.get(link_send)
             timee.sleep(5) # Wait for 5 seconds to load the page
             # pg.press('return')
@@ -357,4 +439,14 @@ def filter_numbers_by_name_excel(file_path, message, filter_condition, name_patt
         print(f"If you find that the column name is different, please change it to '{column_name}' and try again.")
 
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
\ No newline at end of file
+        print(f"An unexpected error occurred: {e}")
+
+# Function to send a message to the contacts with a tag (compared without case or surrounding spaces) in a contact list
+# uploaded through the localhost app, read through the (user, list, tag) index
+def filter_by_tag_list(username, list_name, message, tag):
+    send_to_list(username, list_name, message, lambda localhost, user_id: localhost.iter_list_contacts(user_id, list_name, tag=tag))
+
+# Function to send a message to the contacts whose name starts with/ends with/contains name_pattern in a contact list
+# uploaded through the localhost app, found through the name indexes of the contact table
+def filter_numbers_by_name_list(username, list_name, message, filter_condition, name_pattern):
+    send_to_list(username, list_name, message, lambda localhost, user_id: localhost.iter_name_matches(user_id, list_name, filter_condition, name_pattern))
\ No newline at end of file
@@ -1,13 +1,73 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import pandas as pd
-import csv
-import re
-import os
-from werkzeug.utils import secure_filename
-import json
+import time
+
+# Taken before the other imports so --import-profile can time them (hence noqa: E402)
+STARTED = time.perf_counter()
+
+from flask import Flask, Request, Response, g, request, jsonify, stream_with_context  # noqa: E402
+from flask_cors import CORS  # noqa: E402
+import io  # noqa: E402
+import re  # noqa: E402
+import os  # noqa: E402
+import shutil  # noqa: E402
+import sys  # noqa: E402
+import tempfile  # noqa: E402
+from werkzeug.utils import secure_filename  # noqa: E402
+import json  # noqa: E402
+from contact_batch import ContactBatch, dumps  # noqa: E402
+from csv_contacts import iter_contacts_from_csv  # noqa: E402
+from dedupe import (  # noqa: E402
+    DEDUPE_STRATEGIES,
+    DedupeIndex,
+    DedupeSessions,
+    dedupe_chunks,
+    dedupe_contacts,
+)
+from excel_contacts import iter_contacts_from_excel  # noqa: E402
+from metrics import PROMETHEUS_MIMETYPE, Metrics  # noqa: E402
+from parse_cache import ParseCache  # noqa: E402
+from parse_pool import ParsePool, PoolSaturated  # noqa: E402
+from phone_numbers import clean_phone_number, clean_many  # noqa: E402
+from startup import import_profile, warm_imports  # noqa: E402
+from timings import Timings, iter_with, pop, push, stage, timed_iter  # noqa: E402
+from txt_contacts import iter_contacts_from_txt  # noqa: E402
+
+
+class UploadRequest(Request):
+    """Spool uploaded files to memory, or to a uniquely named temp file
+
+    Temp files not taken over with upload_source() are deleted when the
+    request closes, so rejected uploads never stay on disk.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.spooled_paths = set()
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None, content_length=None
+    ):
+        if (
+            total_content_length is not None
+            and total_content_length <= app.config["UPLOAD_SPOOL_MAX_BYTES"]
+        ):
+            return io.BytesIO()
+        file = tempfile.NamedTemporaryFile(
+            "wb+", dir=app.config["UPLOAD_FOLDER"], prefix="upload-", delete=False
+        )
+        self.spooled_paths.add(file.name)
+        return file
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            for path in self.spooled_paths:
+                discard_upload(path)
+            self.spooled_paths.clear()
+
 
 app = Flask(__name__)
+app.request_class = UploadRequest
 CORS(app)
 
 # Configuration
@@ -19,207 +79,251 @@ if not os.path.exists(UPLOAD_FOLDER):
 
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB max file size
+# Streaming uploads never hold the whole list in memory, so they get a larger cap
+app.config["STREAM_MAX_CONTENT_LENGTH"] = 8 * 1024 * 1024 * 1024  # 8GB
+# Smaller uploads are parsed from memory; larger ones are spooled to UPLOAD_FOLDER
+app.config["UPLOAD_SPOOL_MAX_BYTES"] = 8 * 1024 * 1024  # 8MB
+app.config["CSV_CHUNK_SIZE"] = 10000  # rows per chunk when streaming CSV
+# /upload-batch takes many files (or zips of them) in one request
+app.config["BATCH_MAX_CONTENT_LENGTH"] = 256 * 1024 * 1024  # 256MB
+app.config["BATCH_MAX_FILES"] = 100
+# Limit on what zips in one batch may expand to, against zip bombs
+app.config["BATCH_MAX_UNZIPPED_BYTES"] = 1024 * 1024 * 1024  # 1GB
+app.config["VALIDATE_BATCH_SIZE"] = 10000  # numbers per pass for streamed bodies
+app.config["VALIDATE_READ_BYTES"] = 1024 * 1024  # request body read per block
+app.config["DEDUPE_MAX_SESSIONS"] = 1000  # campaigns whose numbers are remembered
+# Parsed uploads are cached by content hash (PARSE_CACHE=0 disables)
+app.config["PARSE_CACHE"] = os.environ.get("PARSE_CACHE", "1") != "0"
+app.config["PARSE_CACHE_FOLDER"] = "parse_cache"
+app.config["PARSE_CACHE_MAX_BYTES"] = 512 * 1024 * 1024  # 512MB
+# Uploads are parsed in PARSE_WORKERS processes; PARSE_QUEUE_DEPTH more may wait
+# for a worker and anything beyond that gets a 503
+app.config["PARSE_WORKERS"] = int(os.environ.get("PARSE_WORKERS", os.cpu_count() or 1))
+app.config["PARSE_QUEUE_DEPTH"] = int(os.environ.get("PARSE_QUEUE_DEPTH", "8"))
+app.config["BUSY_RETRY_AFTER"] = 5  # seconds clients are told to wait after a 503
+# Import pandas/Excel readers in the background after startup (WARM_IMPORTS=0 disables)
+app.config["WARM_IMPORTS"] = os.environ.get("WARM_IMPORTS", "1") != "0"
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+parse_cache = (
+    ParseCache(app.config["PARSE_CACHE_FOLDER"], app.config["PARSE_CACHE_MAX_BYTES"])
+    if app.config["PARSE_CACHE"]
+    else None
+)
+
+parse_pool = ParsePool(app.config["PARSE_WORKERS"], app.config["PARSE_QUEUE_DEPTH"])
+
+# Request latency per route and per-stage timings, served at /metrics
+metrics = Metrics()
+
+# Numbers already returned per session, so one campaign's uploads dedupe together
+dedupe_sessions = DedupeSessions(app.config["DEDUPE_MAX_SESSIONS"])
 
 
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def clean_phone_number(phone):
-    """Clean and standardize phone number format"""
-    if not phone or pd.isna(phone):
-        return None
-
-    # Convert to string and remove all non-digit characters except +
-    phone_str = str(phone).strip()
-
-    # Remove common separators and spaces
-    cleaned = re.sub(r"[-\s\(\)\.]", "", phone_str)
-
-    # Remove any non-digit characters except +
-    cleaned = re.sub(r"[^\d+]", "", cleaned)
-
-    # Remove leading zeros if not international format
-    if not cleaned.startswith("+") and cleaned.startswith("0"):
-        cleaned = cleaned.lstrip("0")
-
-    # Add + if it's missing and looks like international format
-    if not cleaned.startswith("+") and len(cleaned) > 10:
-        cleaned = "+" + cleaned
-
-    # Validate length (should be between 10-15 digits for valid phone numbers)
-    digits_only = re.sub(r"[^\d]", "", cleaned)
-    if len(digits_only) < 7 or len(digits_only) > 15:
-        return None
-
-    return cleaned
-
-
-def extract_contacts_from_csv(file_path):
-    """Extract contacts from CSV file"""
-    contacts = []
-
-    try:
-        # Try reading with pandas first
-        df = pd.read_csv(file_path)
-
-        # Look for common column names for phone numbers
-        phone_columns = []
-        name_columns = []
-
-        for col in df.columns:
-            col_lower = col.lower()
-            if any(
-                keyword in col_lower
-                for keyword in ["phone", "number", "mobile", "cell", "tel"]
-            ):
-                phone_columns.append(col)
-            elif any(keyword in col_lower for keyword in ["name", "contact", "person"]):
-                name_columns.append(col)
-
-        # Use the first phone column found, or the first column if none found
-        phone_col = phone_columns[0] if phone_columns else df.columns[0]
-        name_col = (
-            name_columns[0]
-            if name_columns
-            else (df.columns[1] if len(df.columns) > 1 else None)
+def dedupe_options(params):
+    """Read the optional `dedupe` strategy and `session` id from request params"""
+    strategy = params.get("dedupe")
+    if not strategy:
+        return None, None
+    if strategy not in DEDUPE_STRATEGIES:
+        raise ValueError(
+            f"Invalid dedupe strategy. Allowed: {', '.join(DEDUPE_STRATEGIES)}"
         )
+    session_id = params.get("session")
+    return strategy, dedupe_sessions.get(session_id) if session_id else None
 
-        for _, row in df.iterrows():
-            phone = clean_phone_number(row[phone_col])
-            if phone:
-                name = (
-                    str(row[name_col]).strip()
-                    if name_col and not pd.isna(row[name_col])
-                    else None
-                )
-                contacts.append(
-                    {"number": phone, "name": name or f"Contact {len(contacts) + 1}"}
-                )
 
-    except Exception as e:
-        # Fallback to manual CSV parsing
-        try:
-            with open(file_path, "r", encoding="utf-8") as file:
-                csv_reader = csv.reader(file)
-                headers = next(csv_reader, None)
-
-                for row in csv_reader:
-                    if row:  # Skip empty rows
-                        phone = clean_phone_number(row[0])
-                        if phone:
-                            name = (
-                                row[1].strip()
-                                if len(row) > 1 and row[1].strip()
-                                else None
-                            )
-                            contacts.append(
-                                {
-                                    "number": phone,
-                                    "name": name or f"Contact {len(contacts) + 1}",
-                                }
-                            )
-        except Exception as e:
-            print(f"Error parsing CSV: {e}")
+def upload_source(file):
+    """Take the spooled upload from the request: a temp file path or a BytesIO
 
-    return contacts
+    The request closes its files, and deletes temp files it still owns, when
+    the view returns, so the stream is detached first; streamed responses
+    keep reading it after that. The caller must pass it to discard_upload().
+    """
+    stream = file.stream
+    file.stream = io.BytesIO()
+    if isinstance(getattr(stream, "name", None), str):
+        stream.close()  # parsers reopen the path
+        request.spooled_paths.discard(stream.name)
+        return stream.name
+    return stream
 
 
-def extract_contacts_from_txt(file_path):
-    """Extract contacts from TXT file"""
-    contacts = []
+def discard_upload(source):
+    """Remove an upload's spool file, or release its in-memory buffer"""
+    if isinstance(source, str):
+        try:
+            os.remove(source)
+        except FileNotFoundError:
+            pass
+    else:
+        source.close()
+
+
+def json_response(result, status=200):
+    """jsonify() for results holding a ContactBatch"""
+    with stage("serialize") as record:
+        record.rows = result.get("count", 0)
+        body = dumps(result) + "\n"
+    return app.response_class(body, status=status, mimetype="application/json")
+
+
+def busy_response(message="All parse workers are busy"):
+    response = jsonify({"error": f"Server busy: {message}. Retry later."})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(app.config["BUSY_RETRY_AFTER"])
+    return response
+
+
+def wants_stream():
+    """Clients opt into NDJSON output with ?stream=1 or an Accept header"""
+    if request.args.get("stream", "").lower() in ("1", "true", "yes"):
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def parse_upload(source, file_extension):
+    """Parse one uploaded file into a ContactBatch, raising if it can't be read
+
+    Runs inside a parse pool worker, so it never starts processes of its own;
+    PARSE_WORKERS alone bounds how many cores uploads use.
+    """
+    if file_extension == "csv":
+        chunks = iter_contacts_from_csv(source, workers=1)
+    elif file_extension == "txt":
+        chunks = iter_contacts_from_txt(source, workers=1)
+    else:
+        chunks = iter_contacts_from_excel(source, file_extension=file_extension)
+    return ContactBatch.concat(chunks)
+
+
+def spool_zip_member(archive, member):
+    """Copy one zip member out the same way uploads are spooled"""
+    with archive.open(member) as data:
+        if member.file_size <= app.config["UPLOAD_SPOOL_MAX_BYTES"]:
+            return io.BytesIO(data.read())
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=app.config["UPLOAD_FOLDER"], prefix="upload-", delete=False
+        ) as file:
+            shutil.copyfileobj(data, file)
+        return file.name
+
+
+def batch_entries(files):
+    """Expand uploaded files and zips into (filename, source, extension, error)
+
+    Zip members are named "archive.zip/member.csv". An entry that can't be
+    parsed (unsupported type, corrupt zip) has an error instead of a source.
+    Raises ValueError when the batch is over its limits. Every source
+    returned must be passed to discard_upload().
+    """
+    import zipfile
+
+    entries = []
+    unzipped = 0
+
+    def add(filename, source=None, extension=None, error=None):
+        if len(entries) >= app.config["BATCH_MAX_FILES"]:
+            if source is not None:
+                discard_upload(source)
+            raise ValueError(
+                f"Too many files. At most {app.config['BATCH_MAX_FILES']} per batch"
+            )
+        entries.append((filename, source, extension, error))
 
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            lines = file.readlines()
-
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line:
+        for file in files:
+            extension = file.filename.rsplit(".", 1)[-1].lower()
+            if extension != "zip":
+                if allowed_file(file.filename):
+                    add(file.filename, upload_source(file), extension)
+                else:
+                    add(file.filename, error="Unsupported file type")
                 continue
 
-            # Try to split by common separators
-            parts = re.split(r"[,;\t|]", line)
-
-            # Extract phone number (look for the part that looks most like a phone number)
-            phone_candidate = None
-            name_candidate = None
-
-            for part in parts:
-                part = part.strip()
-                if re.search(r"[\d+\-\(\)\s]{7,}", part):  # Looks like a phone number
-                    if not phone_candidate:
-                        phone_candidate = part
-                elif part and not name_candidate:  # Looks like a name
-                    name_candidate = part
-
-            # If no clear separation, try to extract phone from the whole line
-            if not phone_candidate:
-                phone_match = re.search(r"[\+]?[\d\-\(\)\s]{7,}", line)
-                if phone_match:
-                    phone_candidate = phone_match.group()
-                    name_candidate = line.replace(phone_candidate, "").strip()
-
-            phone = clean_phone_number(phone_candidate)
-            if phone:
-                contacts.append(
-                    {
-                        "number": phone,
-                        "name": name_candidate or f"Contact {len(contacts) + 1}",
-                    }
-                )
-
-    except Exception as e:
-        print(f"Error parsing TXT file: {e}")
-
-    return contacts
-
-
-def extract_contacts_from_excel(file_path):
-    """Extract contacts from Excel file"""
-    contacts = []
+            source = upload_source(file)
+            try:
+                try:
+                    archive = zipfile.ZipFile(source)
+                except zipfile.BadZipFile:
+                    add(file.filename, error="Not a valid zip file")
+                    continue
+                with archive:
+                    for member in archive.infolist():
+                        basename = member.filename.rsplit("/", 1)[-1]
+                        if member.is_dir() or member.filename.startswith("__MACOSX/"):
+                            continue
+                        if basename.startswith("."):
+                            continue  # hidden files added by archivers
+                        name = f"{file.filename}/{member.filename}"
+                        if not allowed_file(basename):
+                            add(name, error="Unsupported file type")
+                            continue
+                        unzipped += member.file_size
+                        if unzipped > app.config["BATCH_MAX_UNZIPPED_BYTES"]:
+                            raise ValueError("Zip contents exceed the batch size limit")
+                        try:
+                            member_source = spool_zip_member(archive, member)
+                        except Exception as e:
+                            add(name, error=f"Could not unzip file: {str(e)}")
+                            continue
+                        add(name, member_source, basename.rsplit(".", 1)[1].lower())
+            finally:
+                discard_upload(source)
+    except Exception:
+        for _, source, _, _ in entries:
+            if source is not None:
+                discard_upload(source)
+        raise
+    return entries
+
+
+@app.before_request
+def start_timings():
+    g.started = time.perf_counter()
+    g.timings = Timings()
+    g.timings_token = push(g.timings)
+
+
+@app.after_request
+def record_timings(response):
+    timings = g.timings
+    started = g.started
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    method = request.method
+    status = response.status_code
+
+    if not response.is_streamed:
+        # Per-request breakdown for browser devtools and curl -v
+        response.headers["Server-Timing"] = ", ".join(
+            f"{name};dur={seconds * 1000:.2f}"
+            for name, (seconds, _, _) in timings.stages.items()
+        )
 
-    try:
-        df = pd.read_excel(file_path)
-
-        # Look for common column names for phone numbers
-        phone_columns = []
-        name_columns = []
-
-        for col in df.columns:
-            col_lower = col.lower()
-            if any(
-                keyword in col_lower
-                for keyword in ["phone", "number", "mobile", "cell", "tel"]
-            ):
-                phone_columns.append(col)
-            elif any(keyword in col_lower for keyword in ["name", "contact", "person"]):
-                name_columns.append(col)
-
-        # Use the first phone column found, or the first column if none found
-        phone_col = phone_columns[0] if phone_columns else df.columns[0]
-        name_col = (
-            name_columns[0]
-            if name_columns
-            else (df.columns[1] if len(df.columns) > 1 else None)
+    # Streamed bodies are still being produced here; observe once they are sent
+    response.call_on_close(
+        lambda: metrics.observe_request(
+            route, method, status, time.perf_counter() - started, timings
         )
+    )
+    return response
 
-        for _, row in df.iterrows():
-            phone = clean_phone_number(row[phone_col])
-            if phone:
-                name = (
-                    str(row[name_col]).strip()
-                    if name_col and not pd.isna(row[name_col])
-                    else None
-                )
-                contacts.append(
-                    {"number": phone, "name": name or f"Contact {len(contacts) + 1}"}
-                )
 
-    except Exception as e:
-        print(f"Error parsing Excel file: {e}")
+@app.teardown_request
+def stop_timings(exc):
+    token = g.pop("timings_token", None)
+    if token is not None:
+        pop(token)
+
 
-    return contacts
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(metrics.render(), content_type=PROMETHEUS_MIMETYPE)
 
 
 @app.route("/health", methods=["GET"])
@@ -231,55 +335,273 @@ def health_check():
 
 @app.route("/upload", methods=["POST"])
 def upload_file():
-    if "file" not in request.files:
+    stream = wants_stream()
+    if stream:
+        request.max_content_length = app.config["STREAM_MAX_CONTENT_LENGTH"]
+
+    # Turn clients away before their file is read when no parse could start
+    if parse_pool.full:
+        return busy_response()
+
+    # Reading the form spools the uploaded file
+    with stage("receive"):
+        files = request.files
+
+    try:
+        strategy, dedupe_index = dedupe_options(request.values)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if "file" not in files:
         return jsonify({"error": "No file provided"}), 400
 
-    file = request.files["file"]
+    file = files["file"]
     if file.filename == "":
         return jsonify({"error": "No file selected"}), 400
 
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-        file.save(file_path)
+        # Parse the spooled request body in place; nothing is saved under the
+        # client's filename, so concurrent uploads never collide
+        source = upload_source(file)
 
         # Extract contacts based on file type
         file_extension = filename.rsplit(".", 1)[1].lower()
 
+        if stream:
+            # Streamed parses run on the request thread but still take a pool slot
+            try:
+                parse_pool.acquire()
+            except PoolSaturated as e:
+                discard_upload(source)
+                return busy_response(str(e))
+
+            response = Response(
+                iter_with(
+                    g.timings,
+                    stream_contacts(source, file_extension, strategy, dedupe_index),
+                ),
+                mimetype=NDJSON_MIMETYPE,
+            )
+            # Clean up the upload once the response is finished
+            response.call_on_close(lambda: discard_upload(source))
+            response.call_on_close(parse_pool.release)
+            return response
+
         try:
-            if file_extension == "csv":
-                contacts = extract_contacts_from_csv(file_path)
-            elif file_extension == "txt":
-                contacts = extract_contacts_from_txt(file_path)
-            elif file_extension in ["xlsx", "xls"]:
-                contacts = extract_contacts_from_excel(file_path)
+            cache_key = None
+            cached = None
+            if parse_cache:
+                cache_key = parse_cache.key(source, file_extension)
+                cached = parse_cache.get(cache_key)
+
+            if cached:
+                with cached, stage("cache_read") as record:
+                    contacts = ContactBatch.from_dicts(map(json.loads, cached))
+                    record.rows = len(contacts)
             else:
-                return jsonify({"error": "Unsupported file type"}), 400
+                # Raises when the file can't be read, so failures are never cached
+                contacts = parse_pool.run(parse_upload, source, file_extension)
+                if cache_key:
+                    parse_cache.put(cache_key, contacts)
 
-            # Clean up uploaded file
-            os.remove(file_path)
+            result = {
+                "success": True,
+                "contacts": contacts,
+                "count": len(contacts),
+                "message": f"Successfully extracted {len(contacts)} contacts",
+            }
+            if strategy:
+                contacts, duplicates = dedupe_contacts(contacts, strategy, dedupe_index)
+                result.update(
+                    contacts=contacts,
+                    count=len(contacts),
+                    duplicates=duplicates,
+                    message=f"Successfully extracted {len(contacts)} contacts "
+                    f"({duplicates} duplicates removed)",
+                )
 
-            return jsonify(
-                {
-                    "success": True,
-                    "contacts": contacts,
-                    "count": len(contacts),
-                    "message": f"Successfully extracted {len(contacts)} contacts",
-                }
-            )
+            return json_response(result)
+
+        except PoolSaturated as e:
+            return busy_response(str(e))
 
         except Exception as e:
-            # Clean up uploaded file on error
-            if os.path.exists(file_path):
-                os.remove(file_path)
             return jsonify({"error": f"Failed to process file: {str(e)}"}), 500
 
+        finally:
+            discard_upload(source)
+
     return (
         jsonify({"error": "Invalid file type. Allowed types: txt, csv, xlsx, xls"}),
         400,
     )
 
 
+def stream_contacts(source, file_extension, strategy=None, dedupe_index=None):
+    """Yield contacts as NDJSON lines, ending with a summary record"""
+    count = 0
+    duplicates = 0
+
+    try:
+        cache_key = parse_cache.key(source, file_extension) if parse_cache else None
+        chunks = (
+            parse_cache.iter_contacts(cache_key, app.config["CSV_CHUNK_SIZE"])
+            if cache_key
+            else None
+        )
+
+        if chunks is not None:
+            chunks = timed_iter("cache_read", chunks)
+        else:
+            if file_extension == "csv":
+                chunks = iter_contacts_from_csv(source, app.config["CSV_CHUNK_SIZE"])
+            elif file_extension == "txt":
+                # The request thread holds a single pool slot, so parse serially
+                chunks = iter_contacts_from_txt(source, workers=1)
+            else:
+                chunks = iter_contacts_from_excel(
+                    source, app.config["CSV_CHUNK_SIZE"], file_extension
+                )
+
+            if cache_key:
+                chunks = parse_cache.cache_chunks(cache_key, chunks)
+
+        for contacts, chunk_duplicates in dedupe_chunks(chunks, strategy, dedupe_index):
+            duplicates += chunk_duplicates
+            if contacts:
+                with stage("serialize") as record:
+                    record.rows = len(contacts)
+                    lines = contacts.to_ndjson()
+                yield lines
+                count += len(contacts)
+
+        summary = {
+            "success": True,
+            "count": count,
+            "message": f"Successfully extracted {count} contacts",
+        }
+        if strategy:
+            summary["duplicates"] = duplicates
+
+    except Exception as e:
+        summary = {
+            "success": False,
+            "count": count,
+            "error": f"Failed to process file: {str(e)}",
+        }
+
+    yield json.dumps(summary) + "\n"
+
+
+@app.route("/upload-batch", methods=["POST"])
+def upload_batch():
+    """Parse many files (or zips of them) at once into one contact list"""
+    request.max_content_length = app.config["BATCH_MAX_CONTENT_LENGTH"]
+    if parse_pool.full:
+        return busy_response()
+
+    with stage("receive"):
+        files = [file for file in request.files.getlist("files") if file.filename]
+
+    try:
+        strategy, dedupe_index = dedupe_options(request.values)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not files:
+        return jsonify({"error": "No files provided"}), 400
+
+    try:
+        with stage("unzip"):
+            entries = batch_entries(files)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        # Cached files are answered here; the rest are parsed side by side
+        outcomes = [None] * len(entries)
+        cache_keys = [None] * len(entries)
+        to_parse = []
+        for position, (_, source, extension, error) in enumerate(entries):
+            if error:
+                outcomes[position] = (None, error)
+                continue
+            cached = None
+            if parse_cache:
+                cache_keys[position] = parse_cache.key(source, extension)
+                cached = parse_cache.get(cache_keys[position])
+            if cached:
+                with cached, stage("cache_read") as record:
+                    contacts = ContactBatch.from_dicts(map(json.loads, cached))
+                    record.rows = len(contacts)
+                outcomes[position] = (contacts, None)
+            else:
+                to_parse.append(position)
+
+        parsed = parse_pool.run_many(
+            parse_upload,
+            [(entries[position][1], entries[position][2]) for position in to_parse],
+        )
+        for position, (contacts, error) in zip(to_parse, parsed):
+            if error is None and cache_keys[position]:
+                parse_cache.put(cache_keys[position], contacts)
+            outcomes[position] = (
+                contacts,
+                None if error is None else f"Failed to process file: {str(error)}",
+            )
+
+        # Files are merged in upload order; with dedupe, a number kept from
+        # one file is dropped from every later one, as in a dedupe session
+        if strategy and dedupe_index is None:
+            dedupe_index = DedupeIndex()
+        chunks = []
+        reports = []
+        start = 0
+        duplicates = 0
+        for (filename, _, _, _), (contacts, error) in zip(entries, outcomes):
+            report = {"filename": filename, "success": error is None}
+            if error is None:
+                if strategy:
+                    contacts, file_duplicates = dedupe_contacts(
+                        contacts, strategy, dedupe_index
+                    )
+                    duplicates += file_duplicates
+                chunks.append(contacts)
+                report.update(start=start, count=len(contacts))
+                if strategy:
+                    report["duplicates"] = file_duplicates
+                start += len(contacts)
+            else:
+                report["error"] = error
+            reports.append(report)
+
+        contacts = ContactBatch.concat(chunks)
+        parsed_files = sum(report["success"] for report in reports)
+        result = {
+            "success": parsed_files > 0,
+            "contacts": contacts,
+            "count": len(contacts),
+            "files": reports,
+            "message": f"Successfully extracted {len(contacts)} contacts "
+            f"from {parsed_files} of {len(reports)} files",
+        }
+        if strategy:
+            result["duplicates"] = duplicates
+        return json_response(result)
+
+    except PoolSaturated as e:
+        return busy_response(str(e))
+
+    except Exception as e:
+        return jsonify({"error": f"Failed to process files: {str(e)}"}), 500
+
+    finally:
+        for _, source, _, _ in entries:
+            if source is not None:
+                discard_upload(source)
+
+
 @app.route("/parse-manual-numbers", methods=["POST"])
 def parse_manual_numbers():
     """Parse manually entered phone numbers"""
@@ -288,58 +610,83 @@ def parse_manual_numbers():
         if not data or "numbers" not in data:
             return jsonify({"error": "No numbers provided"}), 400
 
-        numbers_text = data["numbers"]
-        contacts = []
-
-        # Split by common separators (newlines, commas, semicolons)
-        raw_numbers = re.split(r"[\n,;]+", numbers_text)
-
-        for raw_number in raw_numbers:
-            raw_number = raw_number.strip()
-            if not raw_number:
-                continue
+        try:
+            strategy, dedupe_index = dedupe_options(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-            # Try to extract name and number if both are present
-            parts = re.split(r"[:\-\|]", raw_number, 1)
-
-            if len(parts) == 2:
-                # Format: "Name: Number" or "Name - Number"
-                name_part = parts[0].strip()
-                number_part = parts[1].strip()
-
-                # Check which part is the number
-                if re.search(r"[\d+\-\(\)\s]{7,}", number_part):
-                    phone = clean_phone_number(number_part)
-                    name = name_part
-                elif re.search(r"[\d+\-\(\)\s]{7,}", name_part):
-                    phone = clean_phone_number(name_part)
-                    name = number_part
+        numbers_text = data["numbers"]
+        numbers = []
+        names = []
+
+        with stage("parse") as record:
+            # Split by common separators (newlines, commas, semicolons)
+            raw_numbers = re.split(r"[\n,;]+", numbers_text)
+            record.rows = len(raw_numbers)
+
+            for raw_number in raw_numbers:
+                raw_number = raw_number.strip()
+                if not raw_number:
+                    continue
+
+                # Try to extract name and number if both are present
+                parts = re.split(r"[:\-\|]", raw_number, 1)
+
+                if len(parts) == 2:
+                    # Format: "Name: Number" or "Name - Number"
+                    name_part = parts[0].strip()
+                    number_part = parts[1].strip()
+
+                    # Check which part is the number
+                    if re.search(r"[\d+\-\(\)\s]{7,}", number_part):
+                        phone = clean_phone_number(number_part)
+                        name = name_part
+                    elif re.search(r"[\d+\-\(\)\s]{7,}", name_part):
+                        phone = clean_phone_number(name_part)
+                        name = number_part
+                    else:
+                        phone = clean_phone_number(raw_number)
+                        name = None
                 else:
+                    # Just a phone number
                     phone = clean_phone_number(raw_number)
                     name = None
-            else:
-                # Just a phone number
-                phone = clean_phone_number(raw_number)
-                name = None
 
-            if phone:
-                contacts.append(
-                    {"number": phone, "name": name or f"Contact {len(contacts) + 1}"}
-                )
+                if phone:
+                    numbers.append(phone)
+                    names.append(name or f"Contact {len(numbers)}")
+
+        contacts = ContactBatch.from_columns(numbers, names)
+        result = {
+            "success": True,
+            "contacts": contacts,
+            "count": len(contacts),
+            "message": f"Successfully parsed {len(contacts)} contacts",
+        }
+        if strategy:
+            contacts, duplicates = dedupe_contacts(contacts, strategy, dedupe_index)
+            result.update(
+                contacts=contacts,
+                count=len(contacts),
+                duplicates=duplicates,
+                message=f"Successfully parsed {len(contacts)} contacts "
+                f"({duplicates} duplicates removed)",
+            )
 
-        return jsonify(
-            {
-                "success": True,
-                "contacts": contacts,
-                "count": len(contacts),
-                "message": f"Successfully parsed {len(contacts)} contacts",
-            }
-        )
+        return json_response(result)
 
     except Exception as e:
         return jsonify({"error": f"Failed to parse numbers: {str(e)}"}), 500
 
 
+@app.route("/dedupe-sessions/<session_id>", methods=["DELETE"])
+def clear_dedupe_session(session_id):
+    """Forget the numbers remembered for a dedupe session"""
+    if not dedupe_sessions.discard(session_id):
+        return jsonify({"error": "Session not found"}), 404
+    return jsonify({"success": True, "message": f"Cleared session {session_id}"})
+
+
 @app.route("/validate-number", methods=["POST"])
 def validate_number():
     """Validate a single phone number"""
@@ -369,7 +716,112 @@ def validate_number():
         )
 
 
+def iter_number_batches(batch_size):
+    """Yield lists of raw numbers from a JSON, text or NDJSON request body"""
+    if request.mimetype in ("text/plain", NDJSON_MIMETYPE):
+        # One number per line, read from the request stream in large blocks;
+        # the partial line at the end of a block is carried into the next
+        ndjson = request.mimetype == NDJSON_MIMETYPE
+        batch = []
+        pending = b""
+        while True:
+            block = request.stream.read(app.config["VALIDATE_READ_BYTES"])
+            if block:
+                complete, _, pending = (pending + block).rpartition(b"\n")
+            else:
+                complete, pending = pending, b""
+            lines = [
+                line.rstrip("\r")
+                for line in complete.decode("utf-8").split("\n")
+                if line.strip()
+            ]
+            if ndjson:
+                lines = [json.loads(line) for line in lines]
+            batch.extend(lines)
+            while len(batch) >= batch_size:
+                yield batch[:batch_size]
+                batch = batch[batch_size:]
+            if not block:
+                break
+        if batch:
+            yield batch
+        return
+
+    data = request.get_json(silent=True)
+    numbers = data.get("numbers") if isinstance(data, dict) else data
+    if not isinstance(numbers, list):
+        raise ValueError("No numbers provided")
+    yield numbers
+
+
+def validation_results(numbers):
+    """Validate a batch of raw numbers in one pass, keeping input order"""
+    with stage("normalize") as record:
+        record.rows = len(numbers)
+        return [
+            {"valid": phone is not None, "cleaned_number": phone, "original": number}
+            for number, phone in zip(numbers, clean_many(numbers))
+        ]
+
+
+@app.route("/validate-numbers", methods=["POST"])
+def validate_numbers():
+    """Validate many phone numbers in one request"""
+    batch_size = app.config["VALIDATE_BATCH_SIZE"]
+
+    if wants_stream():
+        request.max_content_length = app.config["STREAM_MAX_CONTENT_LENGTH"]
+
+        def generate():
+            count = 0
+            valid_count = 0
+            try:
+                for numbers in iter_number_batches(batch_size):
+                    results = validation_results(numbers)
+                    count += len(results)
+                    valid_count += sum(result["valid"] for result in results)
+                    yield "".join(json.dumps(result) + "\n" for result in results)
+                summary = {"success": True, "count": count, "valid_count": valid_count}
+            except Exception as e:
+                summary = {
+                    "success": False,
+                    "count": count,
+                    "error": f"Failed to validate numbers: {str(e)}",
+                }
+            yield json.dumps(summary) + "\n"
+
+        return Response(
+            iter_with(g.timings, stream_with_context(generate())),
+            mimetype=NDJSON_MIMETYPE,
+        )
+
+    try:
+        results = []
+        for numbers in iter_number_batches(batch_size):
+            results.extend(validation_results(numbers))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Failed to validate numbers: {str(e)}"}), 500
+
+    return jsonify(
+        {
+            "success": True,
+            "results": results,
+            "count": len(results),
+            "valid_count": sum(result["valid"] for result in results),
+        }
+    )
+
+
 if __name__ == "__main__":
+    if "--import-profile" in sys.argv:
+        print(json.dumps(import_profile(STARTED)), file=sys.stderr)
+        sys.exit(0)
+
+    if app.config["WARM_IMPORTS"]:
+        warm_imports()
+
     app.run(
         debug=True,
         host="0.0.0.0",
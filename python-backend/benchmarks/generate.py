@@ -0,0 +1,153 @@
+import argparse
+import csv
+import os
+import random
+
+# Synthetic contact files for the benchmarks. The same seed and row count
+# always produce the same file, so results can be compared between commits.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+FORMATS = ("csv", "txt", "xlsx", "manual")
+EXCEL_MAX_ROWS = 1048575  # one sheet holds 1,048,576 rows including the header
+SEED = 20240601
+
+FIRST_NAMES = ["Aarav", "Priya", "John", "Jane", "José", "Zoë", "李", "Fatima"]
+LAST_NAMES = ["Sharma", "Doe", "Smith", "O'Brien", "García", "Müller", "王", "Khan"]
+CITIES = ["Mumbai", "London", "New York", "Lagos", "Berlin", "São Paulo"]
+
+# Ways people actually type numbers into spreadsheets and notes
+PHONE_FORMATS = [
+    "+91 {a}{b} {c}",
+    "+91-{a}-{b}{c}",
+    "0{a}{b}{c}",
+    "{a}{b}{c}",
+    "({a3}) {b3}-{c4}",
+    "+1 {a3}.{b3}.{c4}",
+    "001 {a3} {b3} {c4}",
+    "+44 20 {b4} {c4}",
+    "0044 (0)20 {b4}-{c4}",
+    "+49 30 {c4}{b3}",
+    "tel: +{a}{c}",
+]
+INVALID_PHONES = ["", "12345", "N/A", "not a number", "+", "000-000"]
+NAMES_MISSING = ["", "N/A", "nan"]
+
+
+def messy_phone(rng):
+    if rng.random() < 0.05:
+        return rng.choice(INVALID_PHONES)
+    digits = str(rng.randrange(6000000000, 9999999999))
+    return rng.choice(PHONE_FORMATS).format(
+        a=digits[:5],
+        b=digits[5:7],
+        c=digits[7:],
+        a3=digits[:3],
+        b3=digits[3:6],
+        b4=digits[2:6],
+        c4=digits[6:],
+    )
+
+
+def messy_name(rng):
+    if rng.random() < 0.1:
+        return rng.choice(NAMES_MISSING)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    if rng.random() < 0.05:
+        name = f"  {name}, Jr. "  # stray whitespace and a comma
+    return name
+
+
+def iter_rows(rows, seed=SEED):
+    """Yield (name, phone, city) rows; about 5% repeat an earlier phone"""
+    rng = random.Random(seed)
+    recent = []
+    for _ in range(rows):
+        if recent and rng.random() < 0.05:
+            phone = rng.choice(recent)
+        else:
+            phone = messy_phone(rng)
+            if len(recent) < 1000:
+                recent.append(phone)
+            else:
+                recent[rng.randrange(1000)] = phone
+        yield messy_name(rng), phone, rng.choice(CITIES)
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        # Extra columns make the extractors pick the right ones
+        writer.writerow(["Full Name", "Mobile Number", "City"])
+        writer.writerows(iter_rows(rows))
+
+
+def write_txt(path, rows):
+    separators = [", ", "; ", " - ", "\t", " | ", " "]
+    rng = random.Random(SEED + 1)
+    with open(path, "w", encoding="utf-8") as file:
+        for name, phone, _ in iter_rows(rows):
+            if not name.strip():
+                file.write(f"{phone}\n")
+            elif rng.random() < 0.5:
+                file.write(f"{name}{rng.choice(separators)}{phone}\n")
+            else:
+                file.write(f"{phone}{rng.choice(separators)}{name}\n")
+
+
+def write_xlsx(path, rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["City", "Name", "Phone"])
+    for name, phone, city in iter_rows(rows):
+        sheet.append([city, name or None, phone])
+    workbook.save(path)
+
+
+def write_manual(path, rows):
+    """Text as pasted into the manual entry box ("Name: number" per line)"""
+    with open(path, "w", encoding="utf-8") as file:
+        for name, phone, _ in iter_rows(rows):
+            name = name.strip().replace(",", "")
+            file.write(f"{name}: {phone}\n" if name else f"{phone}\n")
+
+
+WRITERS = {
+    "csv": write_csv,
+    "txt": write_txt,
+    "xlsx": write_xlsx,
+    "manual": write_manual,
+}
+
+
+def data_path(file_format, rows, data_dir=DATA_DIR):
+    extension = "txt" if file_format == "manual" else file_format
+    name = f"manual-{rows}" if file_format == "manual" else f"contacts-{rows}"
+    return os.path.join(data_dir, f"{name}.{extension}")
+
+
+def ensure_file(file_format, rows, data_dir=DATA_DIR):
+    """Path of the synthetic file, generating it on first use"""
+    if file_format == "xlsx" and rows > EXCEL_MAX_ROWS:
+        raise ValueError(f"xlsx files hold at most {EXCEL_MAX_ROWS} rows")
+    path = data_path(file_format, rows, data_dir)
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        WRITERS[file_format](temp_path, rows)
+        os.replace(temp_path, path)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic contact files")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args()
+    for rows in args.sizes:
+        for file_format in args.formats:
+            if file_format == "xlsx" and rows > EXCEL_MAX_ROWS:
+                continue
+            print(ensure_file(file_format, rows, args.data_dir))
@@ -0,0 +1,286 @@
+import argparse
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from generate import DATA_DIR, EXCEL_MAX_ROWS, ensure_file  # noqa: E402
+
+# Each case runs in a fresh process so peak memory belongs to that case
+# alone. Targets:
+#   function  extract_contacts_from_* / parse_manual_numbers called directly
+#   cli       extract_contacts.py / parse_manual_numbers.py as subprocesses
+#   app       /upload and /parse-manual-numbers through Flask's test client
+TARGETS = ("function", "cli", "app")
+FORMATS = ("csv", "txt", "xlsx", "manual")
+DEFAULT_SIZES = [10000, 100000, 1000000]
+# parse_manual_numbers.py takes its text as one argument, which the OS caps
+CLI_MAX_ARG_BYTES = 100 * 1024
+REGRESSION_THRESHOLD = 0.10  # slower or larger by more than this is flagged
+
+
+def peak_rss_mb(usage):
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss * scale / 1e6, 1)
+
+
+def contacts_digest(contacts):
+    """SHA-256 of the contacts as NDJSON, to check targets agree"""
+    digest = hashlib.sha256()
+    for contact in contacts:
+        digest.update((json.dumps(contact) + "\n").encode())
+    return digest.hexdigest()
+
+
+def measure_in_process(target, file_format, path):
+    """Run one function or app case here; returns (seconds, contacts)"""
+    if target == "app":
+        os.environ.update(PARSE_CACHE="0", WARM_IMPORTS="0", PARSE_WORKERS="1")
+        os.chdir(BENCH_DIR)  # keep uploads/ out of the backend directory
+        from app import app, parse_pool
+
+        app.config["MAX_CONTENT_LENGTH"] = None  # measure sizes past the 16MB cap
+        client = app.test_client()
+        started = time.perf_counter()
+        if file_format == "manual":
+            with open(path, encoding="utf-8") as file:
+                response = client.post(
+                    "/parse-manual-numbers", json={"numbers": file.read()}
+                )
+        else:
+            with open(path, "rb") as file:
+                response = client.post(
+                    "/upload", data={"file": (file, os.path.basename(path))}
+                )
+        body = response.get_data()
+        seconds = time.perf_counter() - started
+        parse_pool.shutdown()  # reap the worker so its memory is counted
+        return seconds, json.loads(body)["contacts"]
+
+    started = time.perf_counter()
+    if file_format == "manual":
+        from parse_manual_numbers import parse_manual_numbers
+
+        with open(path, encoding="utf-8") as file:
+            contacts = parse_manual_numbers(file.read())["contacts"]
+    else:
+        import extract_contacts
+
+        extract = {
+            "csv": extract_contacts.extract_contacts_from_csv,
+            "txt": extract_contacts.extract_contacts_from_txt,
+            "xlsx": extract_contacts.extract_contacts_from_excel,
+        }[file_format]
+        contacts = extract(path)
+    return time.perf_counter() - started, contacts
+
+
+def run_child(target, file_format, path):
+    """Measure one function/app case in a fresh interpreter"""
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", target, file_format, path],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def run_cli(file_format, path):
+    """Time a CLI script end to end, interpreter startup included"""
+    if file_format == "manual":
+        with open(path, encoding="utf-8") as file:
+            text = file.read()
+        if len(text.encode()) > CLI_MAX_ARG_BYTES:
+            return None
+        command = [sys.executable, os.path.join(BACKEND_DIR, "parse_manual_numbers.py")]
+        command.append(text)
+    else:
+        command = [sys.executable, os.path.join(BACKEND_DIR, "extract_contacts.py")]
+        command.append(path)
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    stdout = process.stdout.read()
+    process.stdout.close()
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        peak = peak_rss_mb(usage)
+    else:
+        process.wait()
+        peak = None
+    seconds = time.perf_counter() - started
+    contacts = json.loads(stdout)["contacts"]
+    return {
+        "seconds": seconds,
+        "peak_rss_mb": peak,
+        "contacts": len(contacts),
+        "digest": contacts_digest(contacts),
+    }
+
+
+def run_case(target, file_format, rows, data_dir):
+    path = ensure_file(file_format, rows, data_dir)
+    if target == "cli":
+        measured = run_cli(file_format, path)
+        if measured is None:
+            return None
+    else:
+        measured = run_child(target, file_format, path)
+
+    return {
+        "target": target,
+        "format": file_format,
+        "rows": rows,
+        "file_bytes": os.path.getsize(path),
+        "seconds": round(measured["seconds"], 4),
+        "rows_per_second": round(rows / measured["seconds"]),
+        "peak_rss_mb": measured["peak_rss_mb"],
+        "contacts": measured["contacts"],
+        "digest": measured["digest"],
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=BACKEND_DIR,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def check_equivalence(cases):
+    """Every target must return the same contacts for the same input"""
+    digests = {}
+    for case in cases:
+        digests.setdefault((case["format"], case["rows"]), set()).add(case["digest"])
+    return [
+        {"format": file_format, "rows": rows}
+        for (file_format, rows), found in digests.items()
+        if len(found) > 1
+    ]
+
+
+def compare(previous, cases):
+    """Changes against an earlier results file, keyed by target/format/rows"""
+    before = {
+        (case["target"], case["format"], case["rows"]): case
+        for case in previous["cases"]
+    }
+    changes = []
+    for case in cases:
+        old = before.get((case["target"], case["format"], case["rows"]))
+        if old is None:
+            continue
+        change = {
+            "target": case["target"],
+            "format": case["format"],
+            "rows": case["rows"],
+            "seconds_change": round(case["seconds"] / old["seconds"] - 1, 3),
+            "output_changed": case["digest"] != old["digest"],
+        }
+        if case["peak_rss_mb"] and old["peak_rss_mb"]:
+            change["peak_rss_change"] = round(
+                case["peak_rss_mb"] / old["peak_rss_mb"] - 1, 3
+            )
+        change["regression"] = (
+            change["seconds_change"] > REGRESSION_THRESHOLD
+            or change.get("peak_rss_change", 0) > REGRESSION_THRESHOLD
+        )
+        changes.append(change)
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the contact extractors")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=TARGETS)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    cases = []
+    for rows in args.sizes:
+        for file_format in args.formats:
+            if file_format == "xlsx" and rows > EXCEL_MAX_ROWS:
+                continue
+            for target in args.targets:
+                case = run_case(target, file_format, rows, args.data_dir)
+                if case is None:
+                    continue
+                cases.append(case)
+                print(
+                    f"{target:>8} {file_format:>6} {rows:>9} rows  "
+                    f"{case['seconds']:>8.3f}s  {case['rows_per_second']:>9} rows/s  "
+                    f"{case['peak_rss_mb']} MB peak",
+                    file=sys.stderr,
+                )
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "cases": cases,
+        "mismatches": check_equivalence(cases),
+    }
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            results["changes"] = compare(json.load(file), cases)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+    regressed = any(change["regression"] for change in results.get("changes", []))
+    sys.exit(1 if results["mismatches"] or regressed else 0)
+
+
+def child_main(target, file_format, path):
+    seconds, contacts = measure_in_process(target, file_format, path)
+    try:
+        import resource
+    except ImportError:  # Windows
+        peak = None
+    else:
+        # Pool workers (the app's parse pool) count toward the case's memory
+        peak = peak_rss_mb(resource.getrusage(resource.RUSAGE_SELF))
+        peak += peak_rss_mb(resource.getrusage(resource.RUSAGE_CHILDREN))
+        peak = round(peak, 1)
+    print(
+        json.dumps(
+            {
+                "seconds": seconds,
+                "peak_rss_mb": peak,
+                "contacts": len(contacts),
+                "digest": contacts_digest(contacts),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        child_main(*sys.argv[2:])
+    else:
+        main()
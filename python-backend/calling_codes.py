@@ -0,0 +1,307 @@
+import re
+
+# Country calling codes for offline E.164 normalization. Each row is
+# (calling code, regions, national trunk prefix, shortest and longest national
+# significant number). Lengths are the ranges numbers are actually issued in;
+# they reject typos, they are not a full numbering plan.
+CALLING_CODES = [
+    ("1", "US CA PR DO JM TT BS BB AG AI BM DM GD KN KY LC MS SX TC VC VG VI GU AS MP",
+     "1", 10, 10),
+    ("7", "RU KZ", "8", 10, 10),
+    ("20", "EG", "0", 8, 10),
+    ("27", "ZA", "0", 9, 9),
+    ("30", "GR", None, 10, 10),
+    ("31", "NL", "0", 9, 9),
+    ("32", "BE", "0", 8, 9),
+    ("33", "FR", "0", 9, 9),
+    ("34", "ES", None, 9, 9),
+    ("36", "HU", "06", 8, 9),
+    ("39", "IT VA", None, 6, 11),
+    ("40", "RO", "0", 9, 9),
+    ("41", "CH", "0", 9, 9),
+    ("43", "AT", "0", 4, 13),
+    ("44", "GB GG IM JE", "0", 9, 10),
+    ("45", "DK", None, 8, 8),
+    ("46", "SE", "0", 7, 10),
+    ("47", "NO SJ", None, 8, 8),
+    ("48", "PL", None, 9, 9),
+    ("49", "DE", "0", 6, 13),
+    ("51", "PE", "0", 8, 9),
+    ("52", "MX", None, 10, 10),
+    ("53", "CU", "0", 8, 8),
+    ("54", "AR", "0", 10, 11),
+    ("55", "BR", "0", 10, 11),
+    ("56", "CL", None, 9, 9),
+    ("57", "CO", None, 8, 10),
+    ("58", "VE", "0", 10, 10),
+    ("60", "MY", "0", 8, 10),
+    ("61", "AU CX CC", "0", 9, 9),
+    ("62", "ID", "0", 8, 12),
+    ("63", "PH", "0", 8, 10),
+    ("64", "NZ", "0", 8, 10),
+    ("65", "SG", None, 8, 8),
+    ("66", "TH", "0", 8, 9),
+    ("81", "JP", "0", 9, 10),
+    ("82", "KR", "0", 8, 10),
+    ("84", "VN", "0", 9, 10),
+    ("86", "CN", "0", 9, 11),
+    ("90", "TR", "0", 10, 10),
+    ("91", "IN", "0", 10, 10),
+    ("92", "PK", "0", 9, 10),
+    ("93", "AF", "0", 9, 9),
+    ("94", "LK", "0", 9, 9),
+    ("95", "MM", "0", 8, 10),
+    ("98", "IR", "0", 10, 10),
+    ("211", "SS", "0", 9, 9),
+    ("212", "MA EH", "0", 9, 9),
+    ("213", "DZ", "0", 8, 9),
+    ("216", "TN", None, 8, 8),
+    ("218", "LY", "0", 9, 9),
+    ("220", "GM", None, 7, 7),
+    ("221", "SN", None, 9, 9),
+    ("222", "MR", None, 8, 8),
+    ("223", "ML", None, 8, 8),
+    ("224", "GN", None, 9, 9),
+    ("225", "CI", None, 10, 10),
+    ("226", "BF", None, 8, 8),
+    ("227", "NE", None, 8, 8),
+    ("228", "TG", None, 8, 8),
+    ("229", "BJ", None, 8, 10),
+    ("230", "MU", None, 7, 8),
+    ("231", "LR", "0", 7, 9),
+    ("232", "SL", "0", 8, 8),
+    ("233", "GH", "0", 9, 9),
+    ("234", "NG", "0", 8, 10),
+    ("235", "TD", None, 8, 8),
+    ("236", "CF", None, 8, 8),
+    ("237", "CM", None, 9, 9),
+    ("238", "CV", None, 7, 7),
+    ("239", "ST", None, 7, 7),
+    ("240", "GQ", None, 9, 9),
+    ("241", "GA", None, 7, 8),
+    ("242", "CG", None, 9, 9),
+    ("243", "CD", "0", 9, 9),
+    ("244", "AO", None, 9, 9),
+    ("245", "GW", None, 9, 9),
+    ("248", "SC", None, 7, 7),
+    ("249", "SD", "0", 9, 9),
+    ("250", "RW", "0", 9, 9),
+    ("251", "ET", "0", 9, 9),
+    ("252", "SO", "0", 7, 9),
+    ("253", "DJ", None, 8, 8),
+    ("254", "KE", "0", 9, 10),
+    ("255", "TZ", "0", 9, 9),
+    ("256", "UG", "0", 9, 9),
+    ("257", "BI", None, 8, 8),
+    ("258", "MZ", None, 8, 9),
+    ("260", "ZM", "0", 9, 9),
+    ("261", "MG", "0", 9, 9),
+    ("262", "RE YT", "0", 9, 9),
+    ("263", "ZW", "0", 9, 9),
+    ("264", "NA", "0", 8, 9),
+    ("265", "MW", "0", 7, 9),
+    ("266", "LS", None, 8, 8),
+    ("267", "BW", None, 7, 8),
+    ("268", "SZ", None, 8, 8),
+    ("269", "KM", None, 7, 7),
+    ("291", "ER", "0", 7, 7),
+    ("297", "AW", None, 7, 7),
+    ("298", "FO", None, 6, 6),
+    ("299", "GL", None, 6, 6),
+    ("350", "GI", None, 8, 8),
+    ("351", "PT", None, 9, 9),
+    ("352", "LU", None, 4, 11),
+    ("353", "IE", "0", 7, 9),
+    ("354", "IS", None, 7, 9),
+    ("355", "AL", "0", 8, 9),
+    ("356", "MT", None, 8, 8),
+    ("357", "CY", None, 8, 8),
+    ("358", "FI AX", "0", 5, 12),
+    ("359", "BG", "0", 8, 9),
+    ("370", "LT", "8", 8, 8),
+    ("371", "LV", None, 8, 8),
+    ("372", "EE", None, 7, 8),
+    ("373", "MD", "0", 8, 8),
+    ("374", "AM", "0", 8, 8),
+    ("375", "BY", "8", 9, 9),
+    ("376", "AD", None, 6, 9),
+    ("377", "MC", "0", 8, 9),
+    ("378", "SM", None, 6, 10),
+    ("380", "UA", "0", 9, 9),
+    ("381", "RS", "0", 8, 9),
+    ("382", "ME", "0", 8, 8),
+    ("383", "XK", "0", 8, 8),
+    ("385", "HR", "0", 8, 9),
+    ("386", "SI", "0", 8, 8),
+    ("387", "BA", "0", 8, 8),
+    ("389", "MK", "0", 8, 8),
+    ("420", "CZ", None, 9, 9),
+    ("421", "SK", "0", 9, 9),
+    ("423", "LI", None, 7, 7),
+    ("501", "BZ", None, 7, 7),
+    ("502", "GT", None, 8, 8),
+    ("503", "SV", None, 8, 8),
+    ("504", "HN", None, 8, 8),
+    ("505", "NI", None, 8, 8),
+    ("506", "CR", None, 8, 8),
+    ("507", "PA", None, 7, 8),
+    ("509", "HT", None, 8, 8),
+    ("590", "GP BL MF", "0", 9, 9),
+    ("591", "BO", "0", 8, 8),
+    ("592", "GY", None, 7, 7),
+    ("593", "EC", "0", 8, 9),
+    ("594", "GF", "0", 9, 9),
+    ("595", "PY", "0", 9, 9),
+    ("596", "MQ", "0", 9, 9),
+    ("597", "SR", None, 6, 7),
+    ("598", "UY", "0", 8, 8),
+    ("599", "CW BQ", None, 7, 8),
+    ("670", "TL", None, 7, 8),
+    ("673", "BN", None, 7, 7),
+    ("675", "PG", None, 7, 8),
+    ("676", "TO", None, 5, 7),
+    ("677", "SB", None, 5, 7),
+    ("678", "VU", None, 5, 7),
+    ("679", "FJ", None, 7, 7),
+    ("680", "PW", None, 7, 7),
+    ("685", "WS", None, 5, 7),
+    ("686", "KI", None, 5, 8),
+    ("687", "NC", None, 6, 6),
+    ("689", "PF", None, 8, 8),
+    ("691", "FM", None, 7, 7),
+    ("692", "MH", None, 7, 7),
+    ("850", "KP", "0", 8, 10),
+    ("852", "HK", None, 8, 8),
+    ("853", "MO", None, 8, 8),
+    ("855", "KH", "0", 8, 9),
+    ("856", "LA", "0", 8, 10),
+    ("880", "BD", "0", 10, 10),
+    ("886", "TW", "0", 8, 9),
+    ("960", "MV", None, 7, 7),
+    ("961", "LB", "0", 7, 8),
+    ("962", "JO", "0", 8, 9),
+    ("963", "SY", "0", 8, 9),
+    ("964", "IQ", "0", 8, 10),
+    ("965", "KW", None, 8, 8),
+    ("966", "SA", "0", 9, 9),
+    ("967", "YE", "0", 7, 9),
+    ("968", "OM", None, 8, 8),
+    ("970", "PS", "0", 8, 9),
+    ("971", "AE", "0", 8, 9),
+    ("972", "IL", "0", 8, 9),
+    ("973", "BH", None, 8, 8),
+    ("974", "QA", None, 7, 8),
+    ("975", "BT", None, 7, 8),
+    ("976", "MN", "0", 8, 8),
+    ("977", "NP", "0", 8, 10),
+    ("992", "TJ", None, 9, 9),
+    ("993", "TM", "8", 8, 8),
+    ("994", "AZ", "0", 9, 9),
+    ("995", "GE", "0", 9, 9),
+    ("996", "KG", "0", 9, 9),
+    ("998", "UZ", None, 9, 9),
+]
+
+# Prefixes for dialling abroad where they differ from the common "00"
+INTERNATIONAL_PREFIXES = {"1": "011", "7": "810", "61": "0011", "81": "010"}
+DEFAULT_INTERNATIONAL_PREFIX = "00"
+
+NON_PHONE_CHARS = re.compile(r"[^\d+]")
+
+
+class CallingCode:
+    __slots__ = ("code", "trunk", "min_length", "max_length", "international")
+
+    def __init__(self, code, trunk, min_length, max_length):
+        self.code = code
+        self.trunk = trunk
+        self.min_length = min_length
+        self.max_length = max_length
+        self.international = INTERNATIONAL_PREFIXES.get(
+            code, DEFAULT_INTERNATIONAL_PREFIX
+        )
+
+    def national_number(self, digits):
+        """`digits` without a trunk prefix if the length then fits, else None"""
+        if self.trunk and digits.startswith(self.trunk):
+            stripped = digits[len(self.trunk):]
+            if self.min_length <= len(stripped) <= self.max_length:
+                return stripped
+            # National numbers never start with their trunk prefix, except
+            # where it is "8" and toll-free numbers start with 8 too
+            if self.trunk != "8":
+                return None
+        if self.min_length <= len(digits) <= self.max_length:
+            return digits
+        return None
+
+
+def build_trie(rows):
+    """Digit trie of calling codes; a node's None key holds its CallingCode
+
+    Calling codes are prefix-free, so a walk down the first one to three
+    digits of a number meets at most one code.
+    """
+    trie = {}
+    regions = {}
+    for code, region_names, trunk, min_length, max_length in rows:
+        node = trie
+        for digit in code:
+            node = node.setdefault(digit, {})
+        node[None] = calling_code = CallingCode(code, trunk, min_length, max_length)
+        for region in region_names.split():
+            regions[region] = calling_code
+    return trie, regions
+
+
+CODE_TRIE, REGIONS = build_trie(CALLING_CODES)
+CODES = {calling_code.code: calling_code for calling_code in REGIONS.values()}
+
+
+def region_code(region):
+    """CallingCode of a region such as "IN"; raises ValueError if unknown"""
+    try:
+        return REGIONS[region.upper()]
+    except KeyError:
+        raise ValueError(f"Unknown phone region: {region}") from None
+
+
+def international_number(digits):
+    """E.164 for digits that start with a calling code, or None"""
+    node = CODE_TRIE
+    for position, digit in enumerate(digits[:3]):
+        node = node.get(digit)
+        if node is None:
+            return None
+        calling_code = node.get(None)
+        if calling_code is not None:
+            national = calling_code.national_number(digits[position + 1:])
+            return None if national is None else f"+{calling_code.code}{national}"
+    return None
+
+
+def to_e164(phone, home):
+    """Resolve a number to E.164 ("+919876543210") for the home CallingCode
+
+    A number counts as international when it starts with "+", with the home
+    region's dialling-abroad prefix or with "00"; otherwise it is national,
+    unless only reading its first digits as a calling code gives a valid
+    length (a spreadsheet cell like 919876543210). Returns None for numbers
+    that fit neither.
+    """
+    cleaned = NON_PHONE_CHARS.sub("", phone)
+    plus = cleaned.startswith("+")
+    digits = cleaned.replace("+", "")
+    if not plus:
+        for prefix in (home.international, DEFAULT_INTERNATIONAL_PREFIX):
+            if digits.startswith(prefix):
+                digits = digits[len(prefix):]
+                plus = True
+                break
+    if plus:
+        return international_number(digits)
+
+    national = home.national_number(digits)
+    if national is not None:
+        return f"+{home.code}{national}"
+    return international_number(digits)
@@ -0,0 +1,130 @@
+import json
+from array import array
+from itertools import accumulate
+from json.encoder import encode_basestring_ascii
+
+ENCODE_BLOCK = 10000  # contacts split out of the columns at a time when encoding
+
+
+def _offsets(values):
+    return array("Q", accumulate(map(len, values)))
+
+
+def _split(chars, ends, lo=0, hi=None):
+    """Values lo..hi of a column"""
+    start = ends[lo - 1] if lo else 0
+    values = []
+    for end in ends[lo:hi]:
+        values.append(chars[start:end])
+        start = end
+    return values
+
+
+class ContactBatch:
+    """Contacts stored column by column instead of as a list of dicts
+
+    Numbers and names are each kept as one string holding every value back
+    to back, plus an array of end offsets (the layout Arrow uses for string
+    columns). A million contacts take about 50 bytes each instead of the
+    ~320 bytes of a `{"number": ..., "name": ...}` dict and its two strings.
+    """
+
+    __slots__ = ("number_chars", "number_ends", "name_chars", "name_ends")
+
+    def __init__(
+        self, number_chars="", number_ends=None, name_chars="", name_ends=None
+    ):
+        self.number_chars = number_chars
+        self.number_ends = array("Q") if number_ends is None else number_ends
+        self.name_chars = name_chars
+        self.name_ends = array("Q") if name_ends is None else name_ends
+
+    @classmethod
+    def from_columns(cls, numbers, names):
+        """Build a batch from equally long lists of numbers and names"""
+        return cls("".join(numbers), _offsets(numbers), "".join(names), _offsets(names))
+
+    @classmethod
+    def from_dicts(cls, contacts):
+        numbers = []
+        names = []
+        for contact in contacts:
+            numbers.append(contact["number"])
+            names.append(contact["name"])
+        return cls.from_columns(numbers, names)
+
+    @classmethod
+    def concat(cls, batches):
+        """Join batches in order into one"""
+        batches = list(batches)
+        if len(batches) == 1:
+            return batches[0]
+
+        number_ends = array("Q")
+        name_ends = array("Q")
+        number_shift = 0
+        name_shift = 0
+        for batch in batches:
+            number_ends.extend(end + number_shift for end in batch.number_ends)
+            name_ends.extend(end + name_shift for end in batch.name_ends)
+            number_shift += len(batch.number_chars)
+            name_shift += len(batch.name_chars)
+
+        return cls(
+            "".join(batch.number_chars for batch in batches),
+            number_ends,
+            "".join(batch.name_chars for batch in batches),
+            name_ends,
+        )
+
+    def __len__(self):
+        return len(self.number_ends)
+
+    def __iter__(self):
+        for lo in range(0, len(self), ENCODE_BLOCK):
+            for number, name in self._pairs(lo, lo + ENCODE_BLOCK):
+                yield {"number": number, "name": name}
+
+    def _pairs(self, lo=0, hi=None):
+        return zip(
+            _split(self.number_chars, self.number_ends, lo, hi),
+            _split(self.name_chars, self.name_ends, lo, hi),
+        )
+
+    def numbers(self):
+        return _split(self.number_chars, self.number_ends)
+
+    def names(self):
+        return _split(self.name_chars, self.name_ends)
+
+    def to_list(self):
+        """The contacts as `{"number": ..., "name": ...}` dicts"""
+        return list(self)
+
+    def _encoded_blocks(self):
+        # Same text as json.dumps() of each contact dict, without building them
+        encode = encode_basestring_ascii
+        for lo in range(0, len(self), ENCODE_BLOCK):
+            yield [
+                f'{{"number": {encode(number)}, "name": {encode(name)}}}'
+                for number, name in self._pairs(lo, lo + ENCODE_BLOCK)
+            ]
+
+    def to_json(self):
+        """The contacts as a JSON array, as json.dumps(self.to_list()) would"""
+        blocks = (", ".join(block) for block in self._encoded_blocks())
+        return "[" + ", ".join(blocks) + "]"
+
+    def to_ndjson(self):
+        """One JSON contact per line"""
+        return "".join("\n".join(block) + "\n" for block in self._encoded_blocks())
+
+
+def dumps(value):
+    """json.dumps() that encodes ContactBatch values, also inside dicts"""
+    if isinstance(value, ContactBatch):
+        return value.to_json()
+    if isinstance(value, dict):
+        items = (f"{json.dumps(key)}: {dumps(item)}" for key, item in value.items())
+        return "{" + ", ".join(items) + "}"
+    return json.dumps(value)
@@ -0,0 +1,98 @@
+from contact_batch import ContactBatch
+from phone_numbers import clean_many
+from timings import stage
+
+PHONE_KEYWORDS = ["phone", "number", "mobile", "cell", "tel"]
+NAME_KEYWORDS = ["name", "contact", "person"]
+SAMPLE_ROWS = 100  # rows read up front to choose the phone/name columns
+
+# Cell strings pandas reads as missing by default (pandas' STR_NA_VALUES)
+NA_VALUES = {
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+}
+
+
+def rewind(source):
+    """Parsers take a path or a seekable binary file; rewind files before a pass"""
+    if not isinstance(source, str):
+        source.seek(0)
+    return source
+
+
+def detect_contact_columns(columns, sample=None):
+    """Pick the phone and name columns from a header and optional row sample"""
+    phone_columns = []
+    name_columns = []
+
+    for col in columns:
+        col_lower = col.lower()
+        if any(keyword in col_lower for keyword in PHONE_KEYWORDS):
+            phone_columns.append(col)
+        elif any(keyword in col_lower for keyword in NAME_KEYWORDS):
+            name_columns.append(col)
+
+    # Use the first phone column found; without one, the column whose sampled
+    # values are most often valid numbers (the first column if none are)
+    if phone_columns:
+        phone_col = phone_columns[0]
+    elif sample is not None:
+        phone_col = max(
+            columns,
+            key=lambda col: sum(phone is not None for phone in clean_many(sample[col])),
+        )
+    else:
+        phone_col = columns[0]
+    name_col = (
+        name_columns[0] if name_columns else (columns[1] if len(columns) > 1 else None)
+    )
+    return phone_col, name_col
+
+
+def normalize_values(phones, names):
+    """Cleaned numbers and names (None where missing) of the rows with a valid number"""
+    numbers = []
+    contact_names = []
+    for phone, name in zip(clean_many(phones), names):
+        if phone:
+            if name is None or (isinstance(name, float) and name != name):
+                name = None
+            elif isinstance(name, str) and name in NA_VALUES:
+                name = None
+            else:
+                name = str(name).strip() or None
+            numbers.append(phone)
+            contact_names.append(name)
+    return numbers, contact_names
+
+
+def name_contacts(numbers, names, start=0):
+    """ContactBatch with "Contact N" for missing names, N counting on from `start`"""
+    contact_names = [
+        name or f"Contact {count}" for count, name in enumerate(names, start + 1)
+    ]
+    return ContactBatch.from_columns(numbers, contact_names)
+
+
+def contacts_from_values(phones, names, start=0):
+    """Build a ContactBatch from raw phone/name cell values of the same rows"""
+    with stage("normalize") as record:
+        record.rows = len(phones)
+        return name_contacts(*normalize_values(phones, names), start)
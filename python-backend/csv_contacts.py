@@ -0,0 +1,252 @@
+import io
+import mmap
+import os
+
+from contact_batch import ContactBatch
+from contact_columns import (
+    SAMPLE_ROWS,
+    contacts_from_values,
+    detect_contact_columns,
+    name_contacts,
+    normalize_values,
+    rewind,
+)
+from phone_numbers import clean_phone_number
+from timings import call_timed, current, stage, timed_iter
+
+CHUNK_BYTES = 4 * 1024 * 1024  # size of each record-aligned range
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024  # smaller files are parsed in-process
+
+
+def sniff_columns(source):
+    """Choose the phone and name columns from the header and a small sample"""
+    import pandas as pd
+
+    sample = pd.read_csv(rewind(source), nrows=SAMPLE_ROWS, dtype=str)
+    return detect_contact_columns(list(sample.columns), sample)
+
+
+def record_end(mm, size, start, position):
+    """End of the record holding byte `position`, given a record starts at `start`
+
+    A newline ends a record when an even number of quotes precede it since
+    `start`, so newlines inside quoted fields are stepped over.
+    """
+    if position >= size:
+        return size
+    quotes = mm[start:position].count(b'"')
+    while True:
+        end = mm.find(b"\n", position)
+        if end == -1:
+            return size
+        quotes += mm[position:end].count(b'"')
+        if quotes % 2 == 0:
+            return end + 1
+        position = end + 1
+
+
+def record_ranges(mm, size, chunk_bytes=CHUNK_BYTES):
+    """Return (header_end, ranges): the header's end and record-aligned ranges
+
+    A quote in the middle of an unquoted field (`5"2`) is literal to pandas
+    but still counted here, so a range may end inside a quoted field. Pandas
+    then rejects that range and parse_csv_ranges() falls back to serial.
+    """
+    # pandas skips blank lines before the header
+    header_end = 0
+    while header_end < size:
+        line_start = header_end
+        header_end = record_end(mm, size, line_start, line_start)
+        if mm[line_start:header_end].strip():
+            break
+    else:
+        return size, []
+
+    ranges = []
+    start = 0
+    while start < size:
+        end = record_end(mm, size, start, max(start + chunk_bytes, header_end))
+        ranges.append((start, end))
+        start = end
+    return header_end, ranges
+
+
+def parse_csv_range(file_path, header_end, start, end, usecols, phone_col, name_col):
+    """Parse bytes [start, end) of a CSV under its header; run inside pool workers
+
+    Returns (numbers, names, implicit_index); names are None where missing
+    so the caller can number them in file order.
+    """
+    import pandas as pd
+
+    with stage("read") as record:
+        with open(file_path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                data = mm[start:end] if start == 0 else mm[:header_end] + mm[start:end]
+        df = pd.read_csv(io.BytesIO(data), usecols=usecols, dtype=str)
+        record.rows = len(df)
+    del data
+    phones = df[phone_col].tolist()
+    names = df[name_col].tolist() if name_col is not None else [None] * len(df)
+    # pandas turns the first column into the index when the first data row has
+    # one field more than the header; that depends on which row comes first
+    implicit_index = not isinstance(df.index, pd.RangeIndex)
+    with stage("normalize") as record:
+        record.rows = len(phones)
+        numbers, names = normalize_values(phones, names)
+    return numbers, names, implicit_index
+
+
+def parse_csv_ranges(file_path, workers=None):
+    """Parse a large CSV in record-aligned ranges across a process pool
+
+    Returns a list of ContactBatches in file order, or None when the file
+    should be parsed serially instead (too small, one range, or a range that
+    pandas would not read the way a single pass over the file does).
+    """
+    import pandas as pd
+
+    size = os.path.getsize(file_path)
+    if size < PARALLEL_MIN_BYTES:
+        return None
+
+    with open(file_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_end, ranges = record_ranges(mm, size)
+            header = mm[:header_end]
+    if len(ranges) < 2:
+        return None
+
+    with stage("detect_columns"):
+        phone_col, name_col = sniff_columns(file_path)
+        # Each range is read under a copy of the header, which has to give
+        # the same columns as the whole file
+        columns = list(pd.read_csv(file_path, nrows=0).columns)
+        if list(pd.read_csv(io.BytesIO(header), nrows=0).columns) != columns:
+            return None
+    usecols = [phone_col] if name_col is None else [phone_col, name_col]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() hands results back in submission order, i.e. file order
+        parsed = pool.map(
+            call_timed,
+            [parse_csv_range] * len(ranges),
+            [file_path] * len(ranges),
+            [header_end] * len(ranges),
+            [start for start, _ in ranges],
+            [end for _, end in ranges],
+            [usecols] * len(ranges),
+            [phone_col] * len(ranges),
+            [name_col] * len(ranges),
+        )
+        # A ParserError (e.g. a range ending inside a quoted field) reaches
+        # iter_contacts_from_csv(), which then parses the file serially
+        results = []
+        timings = current()
+        for result, stages in parsed:
+            results.append(result)
+            if timings is not None:
+                timings.merge(stages)
+    if len({implicit_index for _, _, implicit_index in results}) > 1:
+        return None
+
+    chunks = []
+    count = 0
+    for numbers, names, _ in results:
+        chunks.append(name_contacts(numbers, names, count))
+        count += len(numbers)
+    return chunks
+
+
+def iter_contacts_from_csv(source, chunksize=None, workers=None):
+    """Yield ContactBatches from a CSV file, `chunksize` rows at a time
+
+    Without a `chunksize`, paths of PARALLEL_MIN_BYTES or more are parsed in
+    record-aligned ranges across `workers` processes (workers=1 disables
+    this) and come one batch per range. The contacts are the same either way.
+    """
+    if isinstance(source, str) and not chunksize and workers != 1:
+        try:
+            chunks = parse_csv_ranges(source, workers)
+        except Exception:
+            chunks = None  # the serial pass reports or works around it
+        if chunks is not None:
+            yield from chunks
+            return
+
+    count = 0
+
+    try:
+        # Try reading with pandas first
+        import pandas as pd
+
+        with stage("detect_columns"):
+            phone_col, name_col = sniff_columns(source)
+
+        # Only the chosen columns, kept as text so "+" and leading zeros survive
+        usecols = [phone_col] if name_col is None else [phone_col, name_col]
+        with stage("read") as record:
+            reader = pd.read_csv(
+                rewind(source), usecols=usecols, dtype=str, chunksize=chunksize
+            )
+            if not chunksize:
+                record.rows = len(reader)
+
+        for df in timed_iter("read", reader) if chunksize else [reader]:
+            phones = df[phone_col].tolist()
+            names = df[name_col].tolist() if name_col is not None else [None] * len(df)
+            contacts = contacts_from_values(phones, names, count)
+            count += len(contacts)
+            yield contacts
+
+    except Exception:
+        # Contacts already sent can't be taken back, so only fall back
+        # to manual parsing if pandas failed before producing any
+        if count:
+            raise
+        yield from timed_iter(
+            "read_fallback", iter_contacts_from_csv_rows(source, chunksize)
+        )
+
+
+def open_text(source):
+    """Open a path, or wrap a binary file without taking ownership of it"""
+    if isinstance(source, str):
+        return open(source, "r", encoding="utf-8")
+    return io.TextIOWrapper(rewind(source), encoding="utf-8")
+
+
+def iter_contacts_from_csv_rows(source, chunksize=None):
+    """Fallback CSV parsing with the csv module (first column is the phone)"""
+    import csv
+
+    numbers = []
+    names = []
+    count = 0
+
+    file = open_text(source)
+    try:
+        csv_reader = csv.reader(file)
+        headers = next(csv_reader, None)
+
+        for row in csv_reader:
+            if row:  # Skip empty rows
+                phone = clean_phone_number(row[0])
+                if phone:
+                    name = row[1].strip() if len(row) > 1 and row[1].strip() else None
+                    count += 1
+                    numbers.append(phone)
+                    names.append(name or f"Contact {count}")
+                    if chunksize and len(numbers) >= chunksize:
+                        yield ContactBatch.from_columns(numbers, names)
+                        numbers = []
+                        names = []
+    finally:
+        if isinstance(source, str):
+            file.close()
+        else:
+            file.detach()  # leave the caller's binary file open
+
+    yield ContactBatch.from_columns(numbers, names)
@@ -0,0 +1,119 @@
+import re
+import threading
+from collections import OrderedDict
+
+from contact_batch import ContactBatch
+from timings import stage
+
+DEDUPE_STRATEGIES = ("first", "last", "merge")
+
+# Names the extractors generate when a row has none ("Contact 12")
+DEFAULT_NAME = re.compile(r"Contact \d+")
+MERGED_NAME_SEPARATOR = " / "
+
+
+class DedupeIndex:
+    """Normalized numbers already returned in one session (e.g. a campaign)"""
+
+    def __init__(self):
+        self.numbers = set()
+        self.lock = threading.Lock()
+
+
+class DedupeSessions:
+    """Session id -> DedupeIndex, evicting the least recently used session"""
+
+    def __init__(self, max_sessions=1000):
+        self.max_sessions = max_sessions
+        self.indexes = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, session_id):
+        with self.lock:
+            index = self.indexes.pop(session_id, None) or DedupeIndex()
+            self.indexes[session_id] = index
+            while len(self.indexes) > self.max_sessions:
+                self.indexes.popitem(last=False)
+            return index
+
+    def discard(self, session_id):
+        with self.lock:
+            return self.indexes.pop(session_id, None) is not None
+
+
+def dedupe_contacts(contacts, strategy="first", index=None):
+    """Drop contacts whose normalized number repeats; returns (contacts, duplicates)
+
+    Takes a ContactBatch (or contact dicts) and returns a ContactBatch.
+    "first" keeps the first occurrence, "last" keeps the last one and
+    "merge" keeps the first position with all distinct real names joined.
+    With an index, numbers returned by earlier uploads of the same session
+    are always dropped, since those contacts have already been sent out.
+    """
+    if strategy not in DEDUPE_STRATEGIES:
+        raise ValueError(
+            f"Invalid dedupe strategy. Allowed: {', '.join(DEDUPE_STRATEGIES)}"
+        )
+    if not isinstance(contacts, ContactBatch):
+        contacts = ContactBatch.from_dicts(contacts)
+
+    with stage("dedupe") as record:
+        record.rows = len(contacts)
+        if index is None:
+            return _dedupe(contacts, strategy, frozenset())
+
+        with index.lock:
+            kept, duplicates = _dedupe(contacts, strategy, index.numbers)
+            index.numbers.update(kept.numbers())
+        return kept, duplicates
+
+
+def dedupe_chunks(chunks, strategy=None, index=None):
+    """Dedupe a stream of ContactBatches, yielding (contacts, duplicates) pairs"""
+    if strategy == "first":
+        # Keep-first is decided chunk by chunk against what was already sent
+        seen = index or DedupeIndex()
+        for contacts in chunks:
+            yield dedupe_contacts(contacts, strategy, seen)
+    elif strategy:
+        # Keep-last and merge need every occurrence before deciding
+        yield dedupe_contacts(ContactBatch.concat(chunks), strategy, index)
+    else:
+        for contacts in chunks:
+            yield contacts, 0
+
+
+def _dedupe(contacts, strategy, previous):
+    kept = {}  # number -> name; insertion order is output order
+    names = {}  # number -> distinct real names, for "merge"
+    duplicates = 0
+
+    pairs = zip(contacts.numbers(), contacts.names())
+    for number, name in reversed(list(pairs)) if strategy == "last" else pairs:
+        if number in previous:
+            duplicates += 1
+            continue
+
+        if number in kept:
+            duplicates += 1
+        else:
+            kept[number] = name
+            names[number] = []
+
+        if strategy == "merge":
+            if not DEFAULT_NAME.fullmatch(name) and name not in names[number]:
+                names[number].append(name)
+
+    numbers = list(kept)
+    if strategy == "merge":
+        result_names = [
+            MERGED_NAME_SEPARATOR.join(names[number]) if names[number] else name
+            for number, name in kept.items()
+        ]
+    else:
+        result_names = list(kept.values())
+
+    if strategy == "last":
+        numbers.reverse()
+        result_names.reverse()
+    return ContactBatch.from_columns(numbers, result_names), duplicates
@@ -0,0 +1,110 @@
+from itertools import islice
+
+from contact_columns import (
+    SAMPLE_ROWS,
+    contacts_from_values,
+    detect_contact_columns,
+    rewind,
+)
+from timings import stage
+
+CHUNK_ROWS = 10000  # rows normalized per batch
+
+
+def header_names(header):
+    """Label header cells the way pandas does (blank -> "Unnamed: N")"""
+    return [
+        f"Unnamed: {index}" if value is None else str(value)
+        for index, value in enumerate(header)
+    ]
+
+
+def iter_contacts_from_xlsx(source, chunksize=CHUNK_ROWS):
+    """Yield ContactBatches, streaming only the phone/name columns"""
+    from openpyxl import load_workbook
+
+    # Read-only mode parses the sheet XML lazily instead of building every cell
+    with stage("read"):
+        workbook = load_workbook(rewind(source), read_only=True, data_only=True)
+    try:
+        with stage("detect_columns"):
+            sheet = workbook.worksheets[0]
+            header = next(sheet.iter_rows(max_row=1, values_only=True), None)
+            if not header:
+                return
+            # Sample the same rows as a CSV, so either export picks the same columns
+            columns = header_names(header)
+            sample_rows = list(
+                sheet.iter_rows(min_row=2, max_row=SAMPLE_ROWS + 1, values_only=True)
+            )
+            sample = {
+                col: [row[index] if index < len(row) else None for row in sample_rows]
+                for index, col in enumerate(columns)
+            }
+            phone_col, name_col = detect_contact_columns(columns, sample)
+        phone_index = columns.index(phone_col)
+        name_index = columns.index(name_col) if name_col is not None else None
+
+        # Only the span between the two chosen columns is materialized per row
+        wanted = [phone_index] if name_index is None else [phone_index, name_index]
+        first = min(wanted)
+        phone_index -= first
+        if name_index is not None:
+            name_index -= first
+
+        count = 0
+        rows = sheet.iter_rows(
+            min_row=2, min_col=first + 1, max_col=max(wanted) + 1, values_only=True
+        )
+        while True:
+            with stage("read") as record:
+                phones = []
+                names = []
+                for row in islice(rows, chunksize):
+                    phones.append(row[phone_index] if phone_index < len(row) else None)
+                    names.append(
+                        row[name_index]
+                        if name_index is not None and name_index < len(row)
+                        else None
+                    )
+                record.rows = len(phones)
+
+            contacts = contacts_from_values(phones, names, count)
+            count += len(contacts)
+            yield contacts
+            if len(phones) < chunksize:
+                break
+    finally:
+        workbook.close()
+
+
+def iter_contacts_from_xls(source, chunksize=CHUNK_ROWS):
+    """Yield ContactBatches from a legacy .xls file (phone/name columns only)"""
+    import pandas as pd
+
+    with stage("detect_columns"):
+        sample = pd.read_excel(rewind(source), nrows=SAMPLE_ROWS, dtype=str)
+        phone_col, name_col = detect_contact_columns(list(sample.columns), sample)
+    usecols = [phone_col] if name_col is None else [phone_col, name_col]
+    with stage("read") as record:
+        df = pd.read_excel(rewind(source), usecols=usecols)
+        record.rows = len(df)
+
+    phones = df[phone_col].tolist()
+    names = df[name_col].tolist() if name_col is not None else [None] * len(phones)
+    count = 0
+    for start in range(0, len(phones), chunksize):
+        contacts = contacts_from_values(
+            phones[start : start + chunksize], names[start : start + chunksize], count
+        )
+        count += len(contacts)
+        yield contacts
+
+
+def iter_contacts_from_excel(source, chunksize=CHUNK_ROWS, file_extension=None):
+    """Yield ContactBatches from an .xlsx or .xls file"""
+    if file_extension is None:
+        file_extension = source.rsplit(".", 1)[-1]
+    if file_extension.lower() == "xls":
+        return iter_contacts_from_xls(source, chunksize)
+    return iter_contacts_from_xlsx(source, chunksize)
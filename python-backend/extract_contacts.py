@@ -1,169 +1,58 @@
-import sys
-import json
-import os
-import re
-import pandas as pd
-import csv
-
-
-def clean_phone_number(phone):
-    if not phone or pd.isna(phone):
-        return None
-    phone_str = str(phone).strip()
-    cleaned = re.sub(r"[-\s\(\)\.]", "", phone_str)
-    cleaned = re.sub(r"[^\d+]", "", cleaned)
-    if not cleaned.startswith("+") and cleaned.startswith("0"):
-        cleaned = cleaned.lstrip("0")
-    if not cleaned.startswith("+") and len(cleaned) > 10:
-        cleaned = "+" + cleaned
-    digits_only = re.sub(r"[^\d]", "", cleaned)
-    if len(digits_only) < 7 or len(digits_only) > 15:
-        return None
-    return cleaned
+import time
+
+# Taken before the other imports so --import-profile and --timings include them
+# (hence noqa: E402)
+STARTED = time.perf_counter()
+
+import sys  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import argparse  # noqa: E402
+from contact_batch import ContactBatch, dumps  # noqa: E402
+from csv_contacts import iter_contacts_from_csv  # noqa: E402
+from dedupe import DEDUPE_STRATEGIES, dedupe_chunks, dedupe_contacts  # noqa: E402
+from excel_contacts import iter_contacts_from_excel  # noqa: E402
+from startup import import_profile  # noqa: E402
+from timings import Timings, activate, stage, write_report  # noqa: E402
+from txt_contacts import iter_contacts_from_txt  # noqa: E402
+
+STREAM_CHUNK_ROWS = 10000  # contacts parsed (and flushed) at a time with --stream
 
 
 def extract_contacts_from_csv(file_path):
-    contacts = []
+    chunks = []
     try:
-        df = pd.read_csv(file_path)
-        phone_columns = []
-        name_columns = []
-        for col in df.columns:
-            col_lower = col.lower()
-            if any(
-                keyword in col_lower
-                for keyword in ["phone", "number", "mobile", "cell", "tel"]
-            ):
-                phone_columns.append(col)
-            elif any(keyword in col_lower for keyword in ["name", "contact", "person"]):
-                name_columns.append(col)
-        phone_col = phone_columns[0] if len(phone_columns) > 0 else df.columns[0]
-        name_col = (
-            name_columns[0]
-            if len(name_columns) > 0
-            else (df.columns[1] if len(df.columns) > 1 else None)
-        )
-        for _, row in df.iterrows():
-            phone = clean_phone_number(row[phone_col])
-            if phone:
-                name_val = row[name_col] if name_col is not None else None
-                if name_col is not None and not (
-                    isinstance(name_val, float) and pd.isna(name_val)
-                ):
-                    name = str(name_val).strip()
-                else:
-                    name = None
-                contacts.append(
-                    {"number": phone, "name": name or f"Contact {len(contacts) + 1}"}
-                )
+        for chunk in iter_contacts_from_csv(file_path):
+            chunks.append(chunk)
     except Exception as e:
-        try:
-            with open(file_path, "r", encoding="utf-8") as file:
-                csv_reader = csv.reader(file)
-                headers = next(csv_reader, None)
-                for row in csv_reader:
-                    if row:
-                        phone = clean_phone_number(row[0])
-                        if phone:
-                            name = (
-                                row[1].strip()
-                                if len(row) > 1 and row[1].strip()
-                                else None
-                            )
-                            contacts.append(
-                                {
-                                    "number": phone,
-                                    "name": name or f"Contact {len(contacts) + 1}",
-                                }
-                            )
-        except Exception as e:
-            pass
-    return contacts
+        pass
+    return ContactBatch.concat(chunks)
 
 
 def extract_contacts_from_txt(file_path):
-    contacts = []
+    chunks = []
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            lines = file.readlines()
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line:
-                continue
-            parts = re.split(r"[,;\t|]", line)
-            phone_candidate = None
-            name_candidate = None
-            for part in parts:
-                part = part.strip()
-                if re.search(r"[\d+\-\(\)\s]{7,}", part):
-                    if not phone_candidate:
-                        phone_candidate = part
-                elif part and not name_candidate:
-                    name_candidate = part
-            if not phone_candidate:
-                phone_match = re.search(r"[\+]?[+\-\(\)\s]{7,}", line)
-                if phone_match:
-                    phone_candidate = phone_match.group()
-                    name_candidate = line.replace(phone_candidate, "").strip()
-            phone = clean_phone_number(phone_candidate)
-            if phone:
-                contacts.append(
-                    {
-                        "number": phone,
-                        "name": name_candidate or f"Contact {len(contacts) + 1}",
-                    }
-                )
+        for chunk in iter_contacts_from_txt(file_path):
+            chunks.append(chunk)
     except Exception as e:
-        pass
-    return contacts
+        chunks = []
+    return ContactBatch.concat(chunks)
 
 
 def extract_contacts_from_excel(file_path):
-    contacts = []
+    chunks = []
     try:
-        df = pd.read_excel(file_path)
-        phone_columns = []
-        name_columns = []
-        for col in df.columns:
-            col_lower = col.lower()
-            if any(
-                keyword in col_lower
-                for keyword in ["phone", "number", "mobile", "cell", "tel"]
-            ):
-                phone_columns.append(col)
-            elif any(keyword in col_lower for keyword in ["name", "contact", "person"]):
-                name_columns.append(col)
-        phone_col = phone_columns[0] if len(phone_columns) > 0 else df.columns[0]
-        name_col = (
-            name_columns[0]
-            if len(name_columns) > 0
-            else (df.columns[1] if len(df.columns) > 1 else None)
-        )
-        for _, row in df.iterrows():
-            phone = clean_phone_number(row[phone_col])
-            if phone:
-                name_val = row[name_col] if name_col is not None else None
-                if name_col is not None and not (
-                    isinstance(name_val, float) and pd.isna(name_val)
-                ):
-                    name = str(name_val).strip()
-                else:
-                    name = None
-                contacts.append(
-                    {"number": phone, "name": name or f"Contact {len(contacts) + 1}"}
-                )
+        for chunk in iter_contacts_from_excel(file_path):
+            chunks.append(chunk)
     except Exception as e:
-        pass
-    return contacts
+        chunks = []
+    return ContactBatch.concat(chunks)
 
 
-if __name__ == "__main__":
-    file_path = sys.argv[1] if len(sys.argv) > 1 else ""
+def extract_contacts(file_path, dedupe=None):
     if not os.path.exists(file_path):
-        print(json.dumps({"success": False, "error": "File not found"}))
-        sys.exit(1)
+        return {"success": False, "error": "File not found"}
     ext = os.path.splitext(file_path)[1].lower()
-    contacts = []
     if ext == ".csv":
         contacts = extract_contacts_from_csv(file_path)
     elif ext == ".txt":
@@ -171,6 +60,96 @@ if __name__ == "__main__":
     elif ext in [".xlsx", ".xls"]:
         contacts = extract_contacts_from_excel(file_path)
     else:
-        print(json.dumps({"success": False, "error": "Unsupported file type"}))
+        return {"success": False, "error": "Unsupported file type"}
+    if dedupe:
+        contacts, duplicates = dedupe_contacts(contacts, dedupe)
+        return {
+            "success": True,
+            "contacts": contacts,
+            "count": len(contacts),
+            "duplicates": duplicates,
+        }
+    return {"success": True, "contacts": contacts, "count": len(contacts)}
+
+
+def iter_contact_chunks(file_path):
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".csv":
+        return iter_contacts_from_csv(file_path, STREAM_CHUNK_ROWS)
+    if ext == ".txt":
+        return iter_contacts_from_txt(file_path, chunksize=STREAM_CHUNK_ROWS)
+    if ext in [".xlsx", ".xls"]:
+        return iter_contacts_from_excel(file_path, STREAM_CHUNK_ROWS)
+    return None
+
+
+def stream_contacts(file_path, dedupe=None, out=sys.stdout):
+    """Write contacts as NDJSON while the file is read, then a summary line
+
+    The summary is the last line: {"success", "count", "duplicates" (with
+    dedupe), "error" (on failure)}. Returns it.
+    """
+    count = 0
+    duplicates = 0
+    error = None
+    chunks = iter_contact_chunks(file_path)
+
+    if not os.path.exists(file_path):
+        error = "File not found"
+    elif chunks is None:
+        error = "Unsupported file type"
+    else:
+        try:
+            for contacts, chunk_duplicates in dedupe_chunks(chunks, dedupe):
+                duplicates += chunk_duplicates
+                if contacts:
+                    with stage("serialize") as record:
+                        record.rows = len(contacts)
+                        lines = contacts.to_ndjson()
+                    out.write(lines)
+                    out.flush()
+                    count += len(contacts)
+        except Exception as e:
+            error = str(e)
+
+    summary = {"success": error is None, "count": count}
+    if dedupe:
+        summary["duplicates"] = duplicates
+    if error:
+        summary["error"] = error
+    out.write(json.dumps(summary) + "\n")
+    out.flush()
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract contacts from a file")
+    parser.add_argument("file_path", nargs="?", default="")
+    parser.add_argument("--dedupe", choices=DEDUPE_STRATEGIES)
+    parser.add_argument("--import-profile", action="store_true")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="print one contact per line as it is parsed, then a summary line",
+    )
+    parser.add_argument(
+        "--timings", action="store_true", help="print per-stage timings to stderr"
+    )
+    args = parser.parse_args()
+    if args.import_profile:
+        print(json.dumps(import_profile(STARTED)), file=sys.stderr)
+        sys.exit(0)
+    timings = Timings()
+    with activate(timings):
+        if args.stream:
+            result = stream_contacts(args.file_path, args.dedupe)
+        else:
+            result = extract_contacts(args.file_path, args.dedupe)
+            with stage("serialize") as record:
+                record.rows = result.get("count", 0)
+                output = dumps(result)
+            print(output)
+    if args.timings:
+        write_report(timings, STARTED)
+    if not result["success"]:
         sys.exit(1)
-    print(json.dumps({"success": True, "contacts": contacts, "count": len(contacts)}))
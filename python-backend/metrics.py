@@ -0,0 +1,112 @@
+import threading
+
+# Prometheus text exposition, kept in-process (no client library needed)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PROMETHEUS_MIMETYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(names, values):
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        value = value.replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return ",".join(pairs)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label combination"""
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, label_values, value):
+        counts = self.series.get(label_values)
+        if counts is None:
+            counts = self.series[label_values] = [0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for label_values, counts in sorted(self.series.items()):
+            labels = _labels(self.label_names, label_values)
+            prefix = f"{labels}," if labels else ""
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {counts[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {counts[-2]}")
+            lines.append(f"{self.name}_count{{{labels}}} {counts[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.series = {}
+
+    def inc(self, label_values, amount=1):
+        self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} counter",
+        ]
+        for label_values, value in sorted(self.series.items()):
+            lines.append(
+                f"{self.name}{{{_labels(self.label_names, label_values)}}} {value}"
+            )
+        return lines
+
+
+class Metrics:
+    """Request latency per route and per-stage parse timings"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.request_seconds = Histogram(
+            "http_request_duration_seconds",
+            "Time from request start until the response body was sent.",
+            ("route", "method", "status"),
+        )
+        self.stage_seconds = Histogram(
+            "contact_stage_duration_seconds",
+            "Time one request spent in each processing stage.",
+            ("stage",),
+        )
+        self.stage_rows = Counter(
+            "contact_stage_rows_total",
+            "Rows handled by each processing stage.",
+            ("stage",),
+        )
+
+    def observe_request(self, route, method, status, seconds, timings=None):
+        with self.lock:
+            self.request_seconds.observe((route, method, str(status)), seconds)
+            if timings is not None:
+                for name, (stage_seconds, rows, _) in timings.stages.items():
+                    self.stage_seconds.observe((name,), stage_seconds)
+                    self.stage_rows.inc((name,), rows)
+
+    def render(self):
+        with self.lock:
+            lines = (
+                self.request_seconds.render()
+                + self.stage_seconds.render()
+                + self.stage_rows.render()
+            )
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from contact_batch import ContactBatch
+from contact_columns import rewind
+from phone_numbers import PARSER_VERSION
+from timings import stage
+
+HASH_BLOCK_SIZE = 1024 * 1024
+# One entry may take at most this fraction of max_bytes, so caching a large
+# upload can't evict every other entry
+MAX_ENTRY_SHARE = 4
+
+
+class ParseCache:
+    """On-disk cache of parsed contacts keyed by the uploaded bytes
+
+    Entries are NDJSON files named after a SHA-256 of the parser version,
+    file type and content. Least recently used entries (by mtime) are
+    evicted once the directory grows past `max_bytes`. Entries bigger than
+    `max_entry_bytes` are not cached at all.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // MAX_ENTRY_SHARE
+        self.evict_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source, file_extension):
+        """Hash a path or binary file together with the parser version"""
+        digest = hashlib.sha256(f"{PARSER_VERSION}\0{file_extension}\0".encode())
+        with stage("hash"):
+            if isinstance(source, str):
+                with open(source, "rb") as file:
+                    for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+                        digest.update(block)
+            else:
+                file = rewind(source)
+                for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, f"{key}.ndjson")
+
+    def get(self, key):
+        """Open the cached contacts for reading, or return None on a miss"""
+        path = self.entry_path(key)
+        try:
+            os.utime(path)  # mark as recently used
+            return open(path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def iter_contacts(self, key, chunksize):
+        """Yield cached ContactBatches of `chunksize`, or None on a miss"""
+        reader = self.get(key)
+        if reader is None:
+            return None
+
+        def chunks():
+            with reader:
+                contacts = []
+                for line in reader:
+                    contacts.append(json.loads(line))
+                    if len(contacts) >= chunksize:
+                        yield ContactBatch.from_dicts(contacts)
+                        contacts = []
+                yield ContactBatch.from_dicts(contacts)
+
+        return chunks()
+
+    @contextmanager
+    def writer(self, key):
+        """Yield a function that appends contacts; the entry appears on success
+
+        Once the entry passes `max_entry_bytes` its file is deleted and later
+        writes are ignored, so nothing is cached for it.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        file = os.fdopen(fd, "wb")
+        written = 0
+
+        def write(contacts):
+            nonlocal written
+            if written > self.max_entry_bytes:
+                return  # too big, already discarded
+            data = contacts.to_ndjson().encode("utf-8")
+            written += len(data)
+            if written > self.max_entry_bytes:
+                file.close()
+                os.remove(temp_path)
+            else:
+                file.write(data)
+
+        try:
+            with file:
+                yield write
+        except BaseException:
+            if written <= self.max_entry_bytes:
+                os.remove(temp_path)
+            raise
+        if written > self.max_entry_bytes:
+            return
+        os.replace(temp_path, self.entry_path(key))
+        self.evict()
+
+    def put(self, key, contacts):
+        with self.writer(key) as write:
+            write(contacts)
+
+    def cache_chunks(self, key, chunks):
+        """Pass chunks of contacts through while writing them to the cache"""
+        with self.writer(key) as write:
+            for contacts in chunks:
+                write(contacts)
+                yield contacts
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        with self.evict_lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".ndjson"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue  # already evicted or still open elsewhere
+                total -= size
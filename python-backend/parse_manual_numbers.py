@@ -1,60 +1,79 @@
-import sys
-import json
-import re
+import time
 
+# Taken before the other imports so --timings includes them (hence noqa: E402)
+STARTED = time.perf_counter()
 
-def clean_phone_number(phone):
-    if not phone:
-        return None
-    phone_str = str(phone).strip()
-    cleaned = re.sub(r"[-\s\(\)\.]", "", phone_str)
-    cleaned = re.sub(r"[^\d+]", "", cleaned)
-    if not cleaned.startswith("+") and cleaned.startswith("0"):
-        cleaned = cleaned.lstrip("0")
-    if not cleaned.startswith("+") and len(cleaned) > 10:
-        cleaned = "+" + cleaned
-    digits_only = re.sub(r"[^\d]", "", cleaned)
-    if len(digits_only) < 7 or len(digits_only) > 15:
-        return None
-    return cleaned
+import re  # noqa: E402
+import argparse  # noqa: E402
 
+from contact_batch import ContactBatch, dumps  # noqa: E402
+from dedupe import DEDUPE_STRATEGIES, dedupe_contacts  # noqa: E402
+from phone_numbers import clean_phone_number  # noqa: E402
+from timings import Timings, activate, stage, write_report  # noqa: E402
 
-def parse_manual_numbers(numbers_text):
-    contacts = []
-    raw_numbers = re.split(r"[\n,;]+", numbers_text)
-    for raw_number in raw_numbers:
-        raw_number = raw_number.strip()
-        if not raw_number:
-            continue
-        parts = re.split(r"[:\-\|]", raw_number, 1)
-        if len(parts) == 2:
-            name_part = parts[0].strip()
-            number_part = parts[1].strip()
-            if re.search(r"[\d+\-\(\)\s]{7,}", number_part):
-                phone = clean_phone_number(number_part)
-                name = name_part
-            elif re.search(r"[\d+\-\(\)\s]{7,}", name_part):
-                phone = clean_phone_number(name_part)
-                name = number_part
+
+def parse_manual_numbers(numbers_text, dedupe=None):
+    numbers = []
+    names = []
+    with stage("parse") as record:
+        raw_numbers = re.split(r"[\n,;]+", numbers_text)
+        record.rows = len(raw_numbers)
+        for raw_number in raw_numbers:
+            raw_number = raw_number.strip()
+            if not raw_number:
+                continue
+            parts = re.split(r"[:\-\|]", raw_number, 1)
+            if len(parts) == 2:
+                name_part = parts[0].strip()
+                number_part = parts[1].strip()
+                if re.search(r"[\d+\-\(\)\s]{7,}", number_part):
+                    phone = clean_phone_number(number_part)
+                    name = name_part
+                elif re.search(r"[\d+\-\(\)\s]{7,}", name_part):
+                    phone = clean_phone_number(name_part)
+                    name = number_part
+                else:
+                    phone = clean_phone_number(raw_number)
+                    name = None
             else:
                 phone = clean_phone_number(raw_number)
                 name = None
-        else:
-            phone = clean_phone_number(raw_number)
-            name = None
-        if phone:
-            contacts.append(
-                {"number": phone, "name": name or f"Contact {len(contacts) + 1}"}
-            )
-    return {
+            if phone:
+                numbers.append(phone)
+                names.append(name or f"Contact {len(numbers)}")
+    contacts = ContactBatch.from_columns(numbers, names)
+    result = {
         "success": True,
         "contacts": contacts,
         "count": len(contacts),
         "message": f"Successfully parsed {len(contacts)} contacts",
     }
+    if dedupe:
+        contacts, duplicates = dedupe_contacts(contacts, dedupe)
+        result.update(
+            contacts=contacts,
+            count=len(contacts),
+            duplicates=duplicates,
+            message=f"Successfully parsed {len(contacts)} contacts "
+            f"({duplicates} duplicates removed)",
+        )
+    return result
 
 
 if __name__ == "__main__":
-    numbers_text = sys.argv[1] if len(sys.argv) > 1 else ""
-    result = parse_manual_numbers(numbers_text)
-    print(json.dumps(result))
+    parser = argparse.ArgumentParser(description="Parse manually entered numbers")
+    parser.add_argument("numbers_text", nargs="?", default="")
+    parser.add_argument("--dedupe", choices=DEDUPE_STRATEGIES)
+    parser.add_argument(
+        "--timings", action="store_true", help="print per-stage timings to stderr"
+    )
+    args = parser.parse_args()
+    timings = Timings()
+    with activate(timings):
+        result = parse_manual_numbers(args.numbers_text, args.dedupe)
+        with stage("serialize") as record:
+            record.rows = result["count"]
+            output = dumps(result)
+    print(output)
+    if args.timings:
+        write_report(timings, STARTED)
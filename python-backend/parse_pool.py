@@ -0,0 +1,135 @@
+import threading
+from contextlib import contextmanager
+
+from timings import call_timed, current
+
+
+class PoolSaturated(Exception):
+    """Every parse worker is busy and the wait queue is full"""
+
+
+class ParsePool:
+    """Process pool that keeps CPU-bound parsing off the request threads
+
+    At most `workers` parses run at once and `queue_depth` more may wait for
+    a worker. Anything beyond that raises PoolSaturated right away, so a
+    burst of large uploads is turned away instead of queuing without bound.
+    """
+
+    def __init__(self, workers, queue_depth):
+        self.workers = workers
+        self.limit = workers + queue_depth
+        self.pending = 0
+        self.executor = None
+        self.lock = threading.Lock()
+
+    @property
+    def full(self):
+        return self.pending >= self.limit
+
+    def acquire(self, count=1):
+        with self.lock:
+            if self.pending + count > self.limit:
+                raise PoolSaturated(
+                    f"All {self.workers} parse workers are busy "
+                    f"and {self.limit - self.workers} requests are queued"
+                )
+            self.pending += count
+
+    def release(self, count=1):
+        with self.lock:
+            self.pending -= count
+
+    @contextmanager
+    def slot(self, count=1):
+        """Hold `count` places in the pool for work done outside it"""
+        self.acquire(count)
+        try:
+            yield
+        finally:
+            self.release(count)
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                from concurrent.futures import ProcessPoolExecutor
+
+                self.executor = ProcessPoolExecutor(self.workers)
+            return self.executor
+
+    def discard(self, executor):
+        """Drop an executor whose worker died (e.g. out of memory)"""
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        executor.shutdown(wait=False)
+
+    def run(self, fn, *args):
+        """Run fn(*args) in a worker process and return its result"""
+        from concurrent.futures.process import BrokenProcessPool
+
+        with self.slot():
+            executor = self.get_executor()
+            try:
+                result, stages = executor.submit(call_timed, fn, *args).result()
+                # Stages timed in the worker count toward this request
+                timings = current()
+                if timings is not None:
+                    timings.merge(stages)
+                return result
+            except BrokenProcessPool:
+                self.discard(executor)  # start fresh next time
+                raise
+
+    def run_many(self, fn, calls):
+        """Run fn(*args) for every args tuple in `calls`, in parallel
+
+        Up to `workers` calls run at once, each holding a place in the pool.
+        Returns one (result, error) pair per call, in the order of `calls`;
+        error is the exception the call raised, or None.
+        """
+        from concurrent.futures import FIRST_COMPLETED, wait
+        from concurrent.futures.process import BrokenProcessPool
+
+        calls = list(calls)
+        outcomes = [None] * len(calls)
+        width = min(len(calls), self.workers)
+        if not width:
+            return outcomes
+
+        with self.slot(width):
+            executor = self.get_executor()
+            timings = current()
+            waiting = iter(enumerate(calls))
+            running = {}
+
+            def submit_next():
+                for index, args in waiting:
+                    running[executor.submit(call_timed, fn, *args)] = index
+                    return
+
+            for _ in range(width):
+                submit_next()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    try:
+                        result, stages = future.result()
+                    except BrokenProcessPool:
+                        self.discard(executor)
+                        raise
+                    except Exception as e:
+                        outcomes[index] = (None, e)
+                    else:
+                        if timings is not None:
+                            timings.merge(stages)
+                        outcomes[index] = (result, None)
+                    submit_next()
+        return outcomes
+
+    def shutdown(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown()
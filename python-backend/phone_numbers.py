@@ -0,0 +1,82 @@
+import os
+import re
+from functools import lru_cache
+
+from calling_codes import region_code, to_e164
+
+# Everything that isn't a digit or "+" (separators, spaces, brackets, letters)
+NON_PHONE_CHARS = re.compile(r"[^\d+]")
+NON_PHONE_OR_NEWLINE = re.compile(r"[^\d+\n]")
+
+# PHONE_NORMALIZATION=e164 resolves every number to E.164 through the calling
+# code table, reading numbers without a country code as PHONE_REGION ones.
+# The default ("digits") only strips formatting and guesses at a leading "+".
+NORMALIZATION = os.environ.get("PHONE_NORMALIZATION", "digits")
+if NORMALIZATION not in ("digits", "e164"):
+    raise ValueError(f"Unknown PHONE_NORMALIZATION: {NORMALIZATION}")
+DEFAULT_REGION = os.environ.get("PHONE_REGION", "IN").upper()
+HOME_CODE = region_code(DEFAULT_REGION)
+
+# Bump whenever normalization or extraction output changes; cached parses
+# made by another version are then ignored
+PARSER_VERSION = "3" if NORMALIZATION == "digits" else f"3-e164-{DEFAULT_REGION}"
+
+CACHE_SIZE = 65536  # distinct raw values remembered by clean_phone_string
+
+
+def clean_phone_number(phone):
+    """Clean and standardize phone number format"""
+    # NaN/None/pd.NA cells never make a valid number
+    if phone is None or (isinstance(phone, float) and phone != phone):
+        return None
+    return clean_phone_string(str(phone))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def clean_phone_string(phone_str):
+    """Cached core of clean_phone_number for an already stringified value"""
+    if NORMALIZATION == "e164":
+        return to_e164(phone_str, HOME_CODE)
+    cleaned = NON_PHONE_CHARS.sub("", phone_str)
+
+    # Remove leading zeros if not international format
+    if not cleaned.startswith("+"):
+        cleaned = cleaned.lstrip("0")
+
+    # Add + if it's missing and looks like international format
+    if not cleaned.startswith("+") and len(cleaned) > 10:
+        cleaned = "+" + cleaned
+
+    # Validate length (7-15 digits for valid phone numbers)
+    digit_count = len(cleaned) - cleaned.count("+")
+    if digit_count < 7 or digit_count > 15:
+        return None
+
+    return cleaned
+
+
+def clean_many(phones):
+    """Clean an iterable of raw values, returning a list (invalid -> None)"""
+    # Strip every value in one regex pass over the newline-joined batch
+    raw = []
+    for phone in phones:
+        if phone is None or (isinstance(phone, float) and phone != phone):
+            raw.append("")
+        else:
+            raw.append(str(phone).replace("\n", ""))
+    if not raw:
+        return []
+    stripped = NON_PHONE_OR_NEWLINE.sub("", "\n".join(raw)).split("\n")
+    if NORMALIZATION == "e164":
+        return [clean_phone_string(cleaned) for cleaned in stripped]
+
+    cleaned_numbers = []
+    for cleaned in stripped:
+        if not cleaned.startswith("+"):
+            cleaned = cleaned.lstrip("0")
+            if not cleaned.startswith("+") and len(cleaned) > 10:
+                cleaned = "+" + cleaned
+        digit_count = len(cleaned) - cleaned.count("+")
+        cleaned_numbers.append(cleaned if 7 <= digit_count <= 15 else None)
+    return cleaned_numbers
+
@@ -0,0 +1,48 @@
+import argparse
+import os
+
+from waitress import serve
+
+from app import app, parse_pool
+from startup import warm_imports
+
+# Production entry point. `python app.py` runs Flask's single development
+# server; this runs the same app on waitress with a pool of request threads,
+# while uploads are parsed in the app's process pool (PARSE_WORKERS).
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the contact processor API")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "5034")))
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=int(os.environ.get("SERVER_THREADS", "8")),
+        help="requests handled at once",
+    )
+    parser.add_argument(
+        "--connection-limit",
+        type=int,
+        default=int(os.environ.get("SERVER_CONNECTION_LIMIT", "100")),
+        help="open connections before new ones wait in the listen backlog",
+    )
+    args = parser.parse_args()
+
+    if app.config["WARM_IMPORTS"]:
+        warm_imports()
+
+    try:
+        serve(
+            app,
+            host=args.host,
+            port=args.port,
+            threads=args.threads,
+            connection_limit=args.connection_limit,
+        )
+    finally:
+        parse_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import importlib
+import sys
+import threading
+import time
+
+# Heavy modules that entry points only import on the code paths needing them
+LAZY_MODULES = ["pandas", "openpyxl", "xlrd"]
+
+
+def import_profile(started, modules=LAZY_MODULES):
+    """Time the entry point's own load (since `started`) and each lazy import"""
+    profile = {
+        "startup_ms": round((time.perf_counter() - started) * 1000, 2),
+        # Lazy modules already loaded here were imported eagerly: a regression
+        "eager_imports": [name for name in modules if name in sys.modules],
+        "imports_ms": {},
+    }
+
+    for name in modules:
+        begin = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            profile["imports_ms"][name] = None
+            continue
+        profile["imports_ms"][name] = round((time.perf_counter() - begin) * 1000, 2)
+
+    return profile
+
+
+def warm_imports(modules=LAZY_MODULES):
+    """Import the lazy modules on a background thread so the first parse is fast"""
+
+    def warm():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+
+    thread = threading.Thread(target=warm, name="warm-imports", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,46 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contact_batch import ContactBatch  # noqa: E402
+from parse_cache import ParseCache  # noqa: E402
+
+
+def contacts(count, prefix="Contact"):
+    return ContactBatch.from_dicts(
+        {"number": f"+9198{i:08d}", "name": f"{prefix} {i}"} for i in range(count)
+    )
+
+
+def entries(directory):
+    return sorted(name for name in os.listdir(directory) if not name.endswith(".tmp"))
+
+
+def test_oversized_put_keeps_existing_entries(tmp_path):
+    cache = ParseCache(str(tmp_path), 10000)
+    for key in ("a", "b", "c"):
+        cache.put(key, contacts(5, key))
+    assert entries(tmp_path) == ["a.ndjson", "b.ndjson", "c.ndjson"]
+
+    cache.put("big", contacts(1000))
+    assert entries(tmp_path) == ["a.ndjson", "b.ndjson", "c.ndjson"]
+    assert sorted(os.listdir(tmp_path)) == entries(tmp_path)  # temp file removed
+
+
+def test_oversized_stream_is_passed_through_uncached(tmp_path):
+    cache = ParseCache(str(tmp_path), 10000)
+    cache.put("a", contacts(5))
+    chunks = [contacts(50) for _ in range(10)]
+
+    assert list(cache.cache_chunks("big", chunks)) == chunks
+    assert entries(tmp_path) == ["a.ndjson"]
+    assert cache.get("big") is None
+
+
+def test_small_entry_is_cached(tmp_path):
+    cache = ParseCache(str(tmp_path), 10000)
+    cache.put("a", contacts(5))
+    assert [batch.to_list() for batch in cache.iter_contacts("a", 100)] == [
+        contacts(5).to_list()
+    ]
@@ -0,0 +1,122 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Hot-path stage timing. Code that does a measurable step wraps it in
+# `stage("name")`; the durations and row counts land in whichever Timings is
+# active for the current request or CLI run, and cost nothing when none is.
+
+_active = ContextVar("timings", default=None)
+
+
+class Stage:
+    __slots__ = ("rows",)
+
+    def __init__(self):
+        self.rows = 0
+
+
+class Timings:
+    """Accumulated seconds, row counts and calls per stage"""
+
+    def __init__(self):
+        self.stages = {}  # name -> [seconds, rows, calls]
+
+    def add(self, name, seconds, rows=0, calls=1):
+        totals = self.stages.setdefault(name, [0.0, 0, 0])
+        totals[0] += seconds
+        totals[1] += rows
+        totals[2] += calls
+
+    def merge(self, stages):
+        for name, (seconds, rows, calls) in stages.items():
+            self.add(name, seconds, rows, calls)
+
+    def report(self):
+        return {
+            name: {"ms": round(seconds * 1000, 2), "rows": rows, "calls": calls}
+            for name, (seconds, rows, calls) in self.stages.items()
+        }
+
+
+def current():
+    """The Timings recording stages here, or None"""
+    return _active.get()
+
+
+def push(timings):
+    """Start recording into `timings`; returns a token for pop()"""
+    return _active.set(timings)
+
+
+def pop(token):
+    _active.reset(token)
+
+
+@contextmanager
+def activate(timings):
+    """Record stages into `timings` for the duration of the block"""
+    token = push(timings)
+    try:
+        yield timings
+    finally:
+        pop(token)
+
+
+@contextmanager
+def stage(name):
+    """Time a block as one call of `name`; set `.rows` on the yielded Stage"""
+    timings = _active.get()
+    record = Stage()
+    if timings is None:
+        yield record
+        return
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        timings.add(name, time.perf_counter() - started, record.rows)
+
+
+def timed_iter(name, iterable, rows=len):
+    """Yield from `iterable`, timing each step as `name` and counting rows(item)"""
+    iterator = iter(iterable)
+    while True:
+        with stage(name) as record:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            record.rows = rows(item)
+        yield item
+
+
+def iter_with(timings, iterable):
+    """Iterate with `timings` active, e.g. for a response streamed after the view"""
+    iterator = iter(iterable)
+    while True:
+        with activate(timings):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def write_report(timings, started, file=None):
+    """Print {"total_ms", "stages"} as one JSON line, to stderr by default"""
+    report = {
+        "total_ms": round((time.perf_counter() - started) * 1000, 2),
+        "stages": timings.report(),
+    }
+    print(json.dumps(report), file=file or sys.stderr)
+
+
+def call_timed(fn, *args):
+    """Run fn(*args) with fresh Timings; returns (result, stages) for merging"""
+    timings = Timings()
+    with activate(timings):
+        result = fn(*args)
+    return result, timings.stages
@@ -0,0 +1,133 @@
+import mmap
+import os
+import re
+
+from contact_batch import ContactBatch
+from contact_columns import rewind
+from phone_numbers import clean_phone_number
+from timings import timed_iter
+
+# Patterns are compiled once per process instead of on every line
+SEPARATORS = re.compile(r"[,;\t|]")
+PHONE_LIKE = re.compile(r"[\d+\-\(\)\s]{7,}")
+PHONE_IN_LINE = re.compile(r"[\+]?[\d\-\(\)\s]{7,}")
+
+CHUNK_BYTES = 4 * 1024 * 1024  # size of each newline-aligned range
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024  # smaller files are parsed in-process
+
+
+def parse_line(line):
+    """Return (phone, name) for one line, or None if it has no valid number"""
+    line = line.strip()
+    if not line:
+        return None
+
+    # Look for the part that looks most like a phone number
+    phone_candidate = None
+    name_candidate = None
+
+    for part in SEPARATORS.split(line):
+        part = part.strip()
+        if PHONE_LIKE.search(part):
+            if not phone_candidate:
+                phone_candidate = part
+        elif part and not name_candidate:
+            name_candidate = part
+
+    # If no clear separation, try to extract phone from the whole line
+    if not phone_candidate:
+        phone_match = PHONE_IN_LINE.search(line)
+        if phone_match:
+            phone_candidate = phone_match.group()
+            name_candidate = line.replace(phone_candidate, "").strip()
+
+    phone = clean_phone_number(phone_candidate)
+    if phone:
+        return phone, name_candidate
+    return None
+
+
+def parse_text(data):
+    """Parse a block of UTF-8 bytes into a list of (phone, name) pairs"""
+    # Same line splitting as reading the file in text mode
+    text = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    parsed = []
+    for line in text.split("\n"):
+        entry = parse_line(line)
+        if entry:
+            parsed.append(entry)
+    return parsed
+
+
+def parse_range(file_path, start, end):
+    """Parse bytes [start, end) of a file; run inside pool workers"""
+    with open(file_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return parse_text(mm[start:end])
+
+
+def newline_ranges(mm, size, chunk_bytes=CHUNK_BYTES):
+    """Split [0, size) into ranges that each end just after a newline"""
+    ranges = []
+    start = 0
+    while start < size:
+        end = mm.find(b"\n", start + chunk_bytes) if start + chunk_bytes < size else -1
+        end = size if end == -1 else end + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def iter_parsed_txt(source, workers=None):
+    """Yield lists of (phone, name) pairs in file order, one per range"""
+    if not isinstance(source, str):
+        # In-memory uploads are small; parse them in-process
+        data = rewind(source).read()
+        for start, end in newline_ranges(data, len(data)):
+            yield parse_text(data[start:end])
+        return
+
+    file_path = source
+    size = os.path.getsize(file_path)
+    if size == 0:
+        return
+
+    with open(file_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            ranges = newline_ranges(mm, size)
+
+            if size < PARALLEL_MIN_BYTES or len(ranges) == 1 or workers == 1:
+                for start, end in ranges:
+                    yield parse_text(mm[start:end])
+                return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() hands results back in submission order, i.e. file order
+        yield from pool.map(
+            parse_range,
+            [file_path] * len(ranges),
+            [start for start, _ in ranges],
+            [end for _, end in ranges],
+        )
+
+
+def iter_contacts_from_txt(source, workers=None, chunksize=None):
+    """Yield ContactBatches from a TXT file in file order
+
+    Each range of the file is one batch, split into batches of at most
+    `chunksize` contacts when it is given.
+    """
+    count = 0
+    # Reading, splitting and normalizing happen together (maybe in workers)
+    for parsed in timed_iter("parse", iter_parsed_txt(source, workers)):
+        step = chunksize or max(len(parsed), 1)
+        for start in range(0, max(len(parsed), 1), step):
+            numbers = []
+            names = []
+            for phone, name in parsed[start : start + step]:
+                count += 1
+                numbers.append(phone)
+                names.append(name or f"Contact {count}")
+            yield ContactBatch.from_columns(numbers, names)
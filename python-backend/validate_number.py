@@ -1,26 +1,35 @@
-import sys
-import json
-import re
+import time
 
+# Taken before the other imports so --timings includes them (hence noqa: E402)
+STARTED = time.perf_counter()
 
-def clean_phone_number(phone):
-    if not phone:
-        return None
-    phone_str = str(phone).strip()
-    cleaned = re.sub(r"[-\s\(\)\.]", "", phone_str)
-    cleaned = re.sub(r"[^\d+]", "", cleaned)
-    if not cleaned.startswith("+") and cleaned.startswith("0"):
-        cleaned = cleaned.lstrip("0")
-    if not cleaned.startswith("+") and len(cleaned) > 10:
-        cleaned = "+" + cleaned
-    digits_only = re.sub(r"[^\d]", "", cleaned)
-    if len(digits_only) < 7 or len(digits_only) > 15:
-        return None
-    return cleaned
+import argparse  # noqa: E402
+import json  # noqa: E402
+
+from phone_numbers import clean_phone_number  # noqa: E402
+from timings import Timings, activate, stage, write_report  # noqa: E402
+
+
+def validate_number(number):
+    with stage("normalize") as record:
+        record.rows = 1
+        phone = clean_phone_number(number)
+    return {"valid": phone is not None, "cleaned_number": phone, "original": number}
 
 
 if __name__ == "__main__":
-    number = sys.argv[1] if len(sys.argv) > 1 else ""
-    phone = clean_phone_number(number)
-    result = {"valid": phone is not None, "cleaned_number": phone, "original": number}
-    print(json.dumps(result))
+    parser = argparse.ArgumentParser(description="Validate a phone number")
+    parser.add_argument("number", nargs="?", default="")
+    parser.add_argument(
+        "--timings", action="store_true", help="print per-stage timings to stderr"
+    )
+    args = parser.parse_args()
+    timings = Timings()
+    with activate(timings):
+        result = validate_number(args.number)
+        with stage("serialize") as record:
+            record.rows = 1
+            output = json.dumps(result)
+    print(output)
+    if args.timings:
+        write_report(timings, STARTED)
@@ -0,0 +1,110 @@
+import sys
+import json
+import inspect
+from contextlib import redirect_stdout
+
+from contact_batch import dumps
+
+# Long-lived alternative to spawning extract_contacts.py, parse_manual_numbers.py
+# and validate_number.py once per call. Speaks line-delimited JSON-RPC 2.0:
+#
+#   -> {"jsonrpc": "2.0", "id": 1, "method": "validate_number", "params": {"number": "+1 555 123 4567"}}
+#   <- {"jsonrpc": "2.0", "id": 1, "result": {"valid": true, ...}}
+#
+# Each result is exactly what the matching script prints to stdout.
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+def extract_contacts(file_path, dedupe=None):
+    # pandas is only paid for once, on the first file
+    from extract_contacts import extract_contacts
+
+    return extract_contacts(file_path, dedupe)
+
+
+def parse_manual_numbers(numbers_text, dedupe=None):
+    from parse_manual_numbers import parse_manual_numbers
+
+    return parse_manual_numbers(numbers_text, dedupe)
+
+
+def validate_number(number):
+    from validate_number import validate_number
+
+    return validate_number(number)
+
+
+METHODS = {
+    "extract_contacts": extract_contacts,
+    "parse_manual_numbers": parse_manual_numbers,
+    "validate_number": validate_number,
+}
+
+
+def error_response(request_id, code, message):
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {"code": code, "message": message},
+    }
+
+
+def handle_request(line):
+    """Run one JSON-RPC request line; returns None for notifications"""
+    try:
+        request = json.loads(line)
+    except ValueError as e:
+        return error_response(None, PARSE_ERROR, f"Parse error: {e}")
+
+    if not isinstance(request, dict) or "method" not in request:
+        return error_response(None, INVALID_REQUEST, "Invalid request")
+
+    request_id = request.get("id")
+    method = METHODS.get(request["method"])
+    params = request.get("params", {})
+
+    if method is None:
+        response = error_response(
+            request_id, METHOD_NOT_FOUND, f"Method not found: {request['method']}"
+        )
+    else:
+        try:
+            if isinstance(params, dict):
+                arguments = inspect.signature(method).bind(**params)
+            else:
+                arguments = inspect.signature(method).bind(*params)
+        except TypeError as e:
+            arguments = None
+            response = error_response(request_id, INVALID_PARAMS, str(e))
+
+        if arguments is not None:
+            try:
+                result = method(*arguments.args, **arguments.kwargs)
+                response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+            except Exception as e:
+                response = error_response(request_id, INTERNAL_ERROR, str(e))
+
+    # Requests without an id are notifications and get no reply
+    return response if "id" in request else None
+
+
+def serve(stdin=sys.stdin, stdout=sys.stdout):
+    """Answer requests until stdin is closed"""
+    for line in iter(stdin.readline, ""):
+        if not line.strip():
+            continue
+        # Stray prints from the parsers must not corrupt the protocol stream
+        with redirect_stdout(sys.stderr):
+            response = handle_request(line)
+        if response is not None:
+            stdout.write(dumps(response) + "\n")
+            stdout.flush()
+
+
+if __name__ == "__main__":
+    serve()